@@ -0,0 +1,135 @@
+"""Report what the application imports at startup and how long a cold start takes.
+
+Runs ``python -X importtime -c "import app.main"`` in a fresh interpreter and
+summarizes the result: total import time, the slowest top-level packages, and
+whether heavy extraction dependencies (NumPy, Pillow) are loaded eagerly. With
+``--ttfb``, also measures import plus the first response from a cold process.
+
+Usage:
+    python scripts/importtime_report.py [--top N] [--ttfb] [--path /] [--runs N]
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).parent.parent / 'src'
+
+# Modules that should only load on the first extraction request
+LAZY_MODULES = ('numpy', 'PIL', 'app.utils.color_extraction', 'app.utils.sampling')
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+# Serves one request through the ASGI app without a server or HTTP client
+FIRST_RESPONSE_SNIPPET = '''
+import asyncio, sys, time
+start = time.perf_counter()
+from app.main import app
+
+async def first_response(path):
+    messages = []
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+    async def send(message):
+        messages.append(message)
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "headers": [(b"host", b"localhost")],
+        "server": ("localhost", 80), "client": ("127.0.0.1", 1234),
+    }
+    await app(scope, receive, send)
+    return messages[0]["status"]
+
+status = asyncio.run(first_response(sys.argv[1]))
+print(status, time.perf_counter() - start)
+'''
+
+
+def run_python(args: list[str]) -> subprocess.CompletedProcess[str]:
+    """Run a fresh interpreter with ``src`` on the path."""
+    env = {**os.environ, 'PYTHONPATH': str(SRC_DIR), 'PYTHONDONTWRITEBYTECODE': '1'}
+    return subprocess.run(
+        [sys.executable, *args], capture_output=True, text=True, env=env, check=True
+    )
+
+
+def import_profile() -> list[tuple[int, int, int, str]]:
+    """Return (self_us, cumulative_us, depth, module) for every module imported by app.main."""
+    result = run_python(['-X', 'importtime', '-c', 'import app.main'])
+    entries = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            entries.append((int(self_us), int(cumulative_us), (len(indent) - 1) // 2, module))
+    return entries
+
+
+def app_subtree(
+    entries: list[tuple[int, int, int, str]],
+) -> list[tuple[int, int, int, str]]:
+    """Return the entries imported (directly or not) by app.main."""
+    # importtime prints children before their parent, so app.main's subtree is
+    # everything between the previous top-level entry and app.main itself
+    end = next(i for i, entry in enumerate(entries) if entry[3] == 'app.main')
+    start = end
+    while start > 0 and entries[start - 1][2] > 0:
+        start -= 1
+    return entries[start : end + 1]
+
+
+def report_imports(top: int) -> None:
+    entries = app_subtree(import_profile())
+    print(f'import app.main: {entries[-1][1] / 1000:.1f} ms cumulative\n')
+
+    # Aggregate first-level imports under app.main by top-level package
+    packages: dict[str, int] = {}
+    for _, cumulative_us, depth, module in entries:
+        if depth == 1:
+            package = module.split('.')[0]
+            packages[package] = packages.get(package, 0) + cumulative_us
+
+    print(f'Slowest packages imported by app.main (top {top}):')
+    for package, cumulative_us in sorted(packages.items(), key=lambda kv: -kv[1])[:top]:
+        print(f'  {cumulative_us / 1000:8.1f} ms  {package}')
+
+    print(f'\nSlowest modules by self time (top {top}):')
+    for self_us, _, _, module in sorted(entries, key=lambda entry: -entry[0])[:top]:
+        print(f'  {self_us / 1000:8.1f} ms  {module}')
+
+    loaded = {module for *_, module in entries}
+    eager = [name for name in LAZY_MODULES if name in loaded]
+    print('\nLazily loaded modules imported at startup:', ', '.join(eager) or 'none')
+
+
+def report_first_response(path: str, runs: int) -> None:
+    timings = []
+    for _ in range(runs):
+        status, seconds = run_python(['-c', FIRST_RESPONSE_SNIPPET, path]).stdout.split()
+        timings.append(float(seconds) * 1000)
+    print(
+        f'\nCold import + first response for GET {path} (status {status}, {runs} runs): '
+        f'median {statistics.median(timings):.1f} ms, min {min(timings):.1f} ms'
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--top', type=int, default=10, help='Rows per table')
+    parser.add_argument('--ttfb', action='store_true', help='Measure cold time to first response')
+    parser.add_argument('--path', default='/', help='Path requested for --ttfb')
+    parser.add_argument('--runs', type=int, default=5, help='Cold processes for --ttfb')
+    args = parser.parse_args()
+
+    report_imports(args.top)
+    if args.ttfb:
+        report_first_response(args.path, args.runs)
+
+
+if __name__ == '__main__':
+    main()
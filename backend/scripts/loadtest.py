@@ -0,0 +1,271 @@
+"""Load generator for the color extraction endpoint.
+
+Drives ``app.main:app`` in-process over an ASGI transport (no server or network
+involved) or a running server such as a local uvicorn, replaying a mix of
+synthetic image uploads. Reports throughput, latency percentiles, error and
+load-shedding rates, and RSS over time.
+
+Usage:
+    # In-process, 8 concurrent clients for 30 seconds
+    python scripts/loadtest.py --concurrency 8 --duration 30
+
+    # Open loop at 20 requests/second against a local server
+    python scripts/loadtest.py --url http://127.0.0.1:8000 --rps 20 --server-pid 12345
+
+Requires httpx (installed with the ``dev`` extra).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import time
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, field
+from io import BytesIO
+from pathlib import Path
+from typing import Any
+
+import httpx
+import numpy as np
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+ENDPOINT = '/api/colors/extract'
+
+# (name, width, height, format, relative weight) of the synthetic upload mix
+UPLOAD_MIX = [
+    ('small-png', 300, 300, 'PNG', 6),
+    ('medium-jpeg', 1280, 960, 'JPEG', 3),
+    ('large-jpeg', 3000, 2000, 'JPEG', 1),
+]
+
+# Responses counted as deliberate load shedding rather than errors
+SHED_STATUSES = {429, 503}
+
+
+@dataclass
+class Upload:
+    """A pre-encoded synthetic image."""
+
+    name: str
+    data: bytes
+    content_type: str
+
+
+@dataclass
+class Results:
+    """Per-request outcomes and RSS samples collected during a run."""
+
+    latencies_ms: list[float] = field(default_factory=list)
+    statuses: dict[int, int] = field(default_factory=dict)
+    failures: int = 0
+    elapsed: float = 0.0
+    rss_samples: list[tuple[float, int]] = field(default_factory=list)
+
+    def record(self, status: int, latency_ms: float) -> None:
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if status < 400:
+            self.latencies_ms.append(latency_ms)
+
+
+def make_upload(name: str, width: int, height: int, fmt: str, seed: int) -> Upload:
+    """Render a photo-like image with a gradient, shapes and noise."""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width] / max(width, height)
+    start, end = rng.integers(0, 256, 3), rng.integers(0, 256, 3)
+    gradient = start + (end - start) * ((x + y) / 2)[..., np.newaxis]
+    image = Image.fromarray(np.clip(gradient, 0, 255).astype(np.uint8))
+
+    draw = ImageDraw.Draw(image)
+    for _ in range(10):
+        x0, y0 = int(rng.integers(0, width)), int(rng.integers(0, height))
+        size = int(rng.integers(width // 20, width // 4))
+        draw.ellipse((x0, y0, x0 + size, y0 + size), fill=tuple(rng.integers(0, 256, 3).tolist()))
+
+    noisy = np.asarray(image).astype(np.float64) + rng.normal(0, 5, (height, width, 3))
+    buffer = BytesIO()
+    Image.fromarray(np.clip(noisy, 0, 255).astype(np.uint8)).save(buffer, fmt, quality=90)
+    return Upload(name, buffer.getvalue(), f'image/{fmt.lower()}')
+
+
+def read_rss(pid: int | None) -> int:
+    """Return resident set size in bytes of ``pid`` (or this process)."""
+    statm = Path(f'/proc/{pid or "self"}/statm')
+    if statm.exists():
+        return int(statm.read_text().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    # Peak RSS is the best available without /proc (KiB on Linux, bytes on macOS)
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+async def send_request(
+    client: httpx.AsyncClient,
+    uploads: list[Upload],
+    weights: list[int],
+    rng: random.Random,
+    args: argparse.Namespace,
+    results: Results,
+) -> None:
+    upload = rng.choices(uploads, weights)[0]
+    params: dict[str, Any] = {'num_colors': rng.randint(2, 10)}
+    if rng.random() < args.palettes_ratio:
+        params['palettes'] = 'true'
+
+    start = time.perf_counter()
+    try:
+        response = await client.post(
+            ENDPOINT,
+            params=params,
+            files={'file': (upload.name, upload.data, upload.content_type)},
+        )
+        results.record(response.status_code, (time.perf_counter() - start) * 1000)
+    except httpx.HTTPError:
+        results.failures += 1
+
+
+async def closed_loop(send: Any, concurrency: int, deadline: float) -> None:
+    """Keep ``concurrency`` requests in flight until the deadline."""
+
+    async def worker() -> None:
+        while time.perf_counter() < deadline:
+            await send()
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def open_loop(send: Any, rps: float, deadline: float, max_outstanding: int) -> None:
+    """Start requests at Poisson arrivals of rate ``rps``, regardless of completions."""
+    rng = random.Random(0)
+    outstanding: set[asyncio.Task[None]] = set()
+    next_start = time.perf_counter()
+    while next_start < deadline:
+        await asyncio.sleep(max(0.0, next_start - time.perf_counter()))
+        if len(outstanding) < max_outstanding:
+            task = asyncio.create_task(send())
+            outstanding.add(task)
+            task.add_done_callback(outstanding.discard)
+        next_start += rng.expovariate(rps)
+    await asyncio.gather(*outstanding)
+
+
+async def sample_rss(results: Results, pid: int | None, start: float, interval: float) -> None:
+    while True:
+        results.rss_samples.append((time.perf_counter() - start, read_rss(pid)))
+        await asyncio.sleep(interval)
+
+
+async def run(args: argparse.Namespace) -> Results:
+    uploads = [
+        make_upload(name, width, height, fmt, seed)
+        for seed, (name, width, height, fmt, _) in enumerate(UPLOAD_MIX)
+    ]
+    weights = [weight for *_, weight in UPLOAD_MIX]
+    results = Results()
+    rng = random.Random(args.seed)
+
+    async with AsyncExitStack() as stack:
+        if args.url:
+            client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+            rss_pid = args.server_pid
+        else:
+            from app.main import app
+
+            # ASGITransport does not run lifespan events, so enter them here
+            await stack.enter_async_context(app.router.lifespan_context(app))
+            transport = httpx.ASGITransport(app=app)
+            client = httpx.AsyncClient(
+                transport=transport, base_url='http://loadtest', timeout=args.timeout
+            )
+            rss_pid = None
+        await stack.enter_async_context(client)
+
+        async def send() -> None:
+            await send_request(client, uploads, weights, rng, args, results)
+
+        start = time.perf_counter()
+        sampler = asyncio.create_task(sample_rss(results, rss_pid, start, args.rss_interval))
+        deadline = start + args.duration
+        if args.rps:
+            await open_loop(send, args.rps, deadline, args.max_outstanding)
+        else:
+            await closed_loop(send, args.concurrency, deadline)
+        results.elapsed = time.perf_counter() - start
+        sampler.cancel()
+
+    return results
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return float('nan')
+    return statistics.quantiles(values, n=100, method='inclusive')[int(q) - 1]
+
+
+def summarize(results: Results) -> dict[str, Any]:
+    elapsed = results.elapsed
+    total = sum(results.statuses.values()) + results.failures
+    shed = sum(count for status, count in results.statuses.items() if status in SHED_STATUSES)
+    errors = results.failures + sum(
+        count
+        for status, count in results.statuses.items()
+        if status >= 400 and status not in SHED_STATUSES
+    )
+    return {
+        'requests': total,
+        'elapsed_s': round(elapsed, 2),
+        'throughput_rps': round(len(results.latencies_ms) / elapsed, 2),
+        'latency_ms': {
+            'p50': round(percentile(results.latencies_ms, 50), 1),
+            'p95': round(percentile(results.latencies_ms, 95), 1),
+            'p99': round(percentile(results.latencies_ms, 99), 1),
+        },
+        'error_rate': round(errors / total, 4) if total else 0.0,
+        'shed_rate': round(shed / total, 4) if total else 0.0,
+        'statuses': dict(sorted(results.statuses.items())),
+        'rss_mb': [(round(t, 1), round(rss / 2**20, 1)) for t, rss in results.rss_samples],
+    }
+
+
+def print_report(summary: dict[str, Any]) -> None:
+    latency = summary['latency_ms']
+    print(f"requests:    {summary['requests']} in {summary['elapsed_s']} s")
+    print(f"throughput:  {summary['throughput_rps']} successful req/s")
+    print(f"latency:     p50 {latency['p50']} ms, p95 {latency['p95']} ms, p99 {latency['p99']} ms")
+    print(f"errors:      {summary['error_rate']:.2%}  shed: {summary['shed_rate']:.2%}")
+    print(f"statuses:    {summary['statuses']}")
+    print('rss over time (s, MB):')
+    for t, rss in summary['rss_mb']:
+        print(f'  {t:6.1f}  {rss:8.1f}')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--url', help='Base URL of a running server (default: in-process ASGI)')
+    parser.add_argument('--server-pid', type=int, help='PID whose RSS to sample with --url')
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument('--concurrency', type=int, default=4, help='Closed-loop clients')
+    load.add_argument('--rps', type=float, help='Open-loop arrival rate (requests/second)')
+    parser.add_argument('--duration', type=float, default=20, help='Seconds to generate load')
+    parser.add_argument('--max-outstanding', type=int, default=256, help='Open-loop in-flight cap')
+    parser.add_argument('--palettes-ratio', type=float, default=0.2, help='Share with palettes')
+    parser.add_argument('--timeout', type=float, default=60, help='Per-request timeout (s)')
+    parser.add_argument('--rss-interval', type=float, default=1.0, help='RSS sampling period (s)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', type=Path, help='Also write the summary as JSON')
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    summary = summarize(results)
+    print_report(summary)
+    if args.json:
+        args.json.write_text(json.dumps(summary, indent=2))
+
+
+if __name__ == '__main__':
+    main()
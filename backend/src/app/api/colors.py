@@ -1,327 +1,259 @@
-"""Color extraction endpoint using k-means++ algorithm."""
+"""Color extraction endpoints.
 
+The extraction algorithms live in ``app.utils.color_extraction`` and are imported
+inside each endpoint, so NumPy and Pillow load on the first extraction request
+instead of at application startup (keeps serverless cold starts fast).
+
+Decode, clustering, contrast, token matching and palette search run on the fair
+scheduler (``app.core.scheduler``), queued per client, so one client's burst of
+requests doesn't delay everyone else; clients over their rate limit or queue cap
+get 429 with ``Retry-After``.
+"""
+
+from collections.abc import Callable
+from functools import partial
 from io import BytesIO
+from typing import TYPE_CHECKING, Literal
 
-import numpy as np
-from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
-from numpy.typing import NDArray
-from PIL import Image
+from fastapi import APIRouter, Depends, File, Header, HTTPException, Query, UploadFile
 from starlette.concurrency import run_in_threadpool
 
 from app.core.config import Settings
-from app.core.logging import get_logger
-from app.dependencies import get_settings_dependency
-from app.schemas.colors import ColorExtractionResponse, ExtractedColor
-from app.utils.color_conversion import oklab_to_rgb, rgb_to_oklab
+from app.core.logging import get_logger, get_request_id
+from app.core.profiling import get_profile_store, profile_call
+from app.core.session_store import ImageSession, get_session_store
+from app.dependencies import admit_client, get_settings_dependency, run_scheduled
+from app.schemas.colors import (
+    DEFAULT_TARGET_SAMPLES,
+    MAX_CONTRAST_MATRIX_COLORS,
+    ColorExtractionResponse,
+    ColorSessionResponse,
+    ColorSessionStatsResponse,
+    ContrastRequest,
+    ContrastResponse,
+    ExtractedColor,
+    NearestColorRequest,
+    NearestColorResponse,
+    PaletteSearchRequest,
+    PaletteSearchResponse,
+    PaletteSelection,
+    SamplingStrategy,
+)
+from app.schemas.profiling import ProfileReport
 from app.utils.file_validation import validate_image_magic_number
 
-router = APIRouter()
-logger = get_logger(__name__)
-
-
-def kmeans_plusplus_init(
-    pixels: NDArray[np.float64],
-    n_clusters: int,
-    rng: np.random.Generator,
-) -> NDArray[np.float64]:
-    """Initialize cluster centers using k-means++ algorithm."""
-    n_samples = pixels.shape[0]
-    centers: list[NDArray[np.float64]] = []
-
-    # Choose first center randomly
-    first_idx = rng.integers(n_samples)
-    centers.append(pixels[first_idx])
-
-    for _ in range(1, n_clusters):
-        # Compute distances to nearest center
-        distances = np.min(
-            [np.sum((pixels - c) ** 2, axis=1) for c in centers],
-            axis=0,
-        )
-
-        # Choose next center with probability proportional to distance squared
-        total_dist = distances.sum()
-        if total_dist == 0:
-            # All pixels are identical to existing centers, pick randomly
-            next_idx = int(rng.integers(n_samples))
-        else:
-            probabilities = distances / total_dist
-            next_idx = int(rng.choice(n_samples, p=probabilities))
-        centers.append(pixels[next_idx])
-
-    return np.array(centers)
-
-
-def kmeans(
-    pixels: NDArray[np.float64],
-    n_clusters: int,
-    max_iterations: int = 100,
-    random_state: int = 42,
-    chroma_weight: float = 10,
-) -> tuple[NDArray[np.float64], NDArray[np.intp]]:
-    """K-means clustering with k-means++ initialization and chroma weighting.
-
-    Args:
-        pixels: Input pixels in Oklab space
-        n_clusters: Number of clusters
-        max_iterations: Maximum iterations
-        random_state: Random seed
-        chroma_weight: Weight factor for saturated colors (higher = more emphasis on vivid colors)
-    """
-    rng = np.random.default_rng(random_state)
-
-    # Calculate chroma (saturation) for each pixel: sqrt(a² + b²)
-    chroma = np.sqrt(pixels[:, 1] ** 2 + pixels[:, 2] ** 2)
-    # Normalize chroma weights: 1 + chroma * factor
-    pixel_weights = 1.0 + chroma * chroma_weight
-
-    # Initialize centers using k-means++
-    centers = kmeans_plusplus_init(pixels, n_clusters, rng)
-
-    for _ in range(max_iterations):
-        # Assign pixels to nearest center
-        distances = np.array([np.sum((pixels - c) ** 2, axis=1) for c in centers])
-        labels = np.argmin(distances, axis=0)
-
-        # Update centers using weighted mean
-        new_centers = []
-        for k in range(n_clusters):
-            mask = labels == k
-            if np.any(mask):
-                cluster_pixels = pixels[mask]
-                cluster_weights = pixel_weights[mask]
-                # Weighted mean: saturated colors have more influence
-                weighted_sum = np.sum(cluster_pixels * cluster_weights[:, np.newaxis], axis=0)
-                new_center = weighted_sum / cluster_weights.sum()
-                new_centers.append(new_center)
-            else:
-                new_centers.append(centers[k])
-        new_centers_array: NDArray[np.float64] = np.array(new_centers)
-
-        # Check convergence
-        if np.allclose(centers, new_centers_array):
-            break
-
-        centers = new_centers_array
-
-    return centers, labels
-
-
-def mean_shift(
-    pixels: NDArray[np.float64],
-    bandwidth: float = 0.04,
-    max_iterations: int = 50,
-    convergence_threshold: float = 1e-4,
-    max_clusters: int = 10,
-    chroma_weight: float = 10,
-) -> tuple[NDArray[np.float64], NDArray[np.intp]]:
-    """Mean Shift clustering for automatic cluster detection.
-
-    Args:
-        pixels: Input pixels in Oklab space
-        bandwidth: Kernel bandwidth (larger = fewer clusters)
-        max_iterations: Maximum iterations per point
-        convergence_threshold: Stop when shift is smaller than this
-        max_clusters: Maximum number of clusters to return
-        chroma_weight: Weight factor for saturated colors (higher = more emphasis on vivid colors)
-    """
-    n_samples = len(pixels)
-
-    # Calculate chroma (saturation) for each pixel: sqrt(a² + b²)
-    chroma = np.sqrt(pixels[:, 1] ** 2 + pixels[:, 2] ** 2)
-    # Normalize chroma weights: 1 + chroma * factor
-    pixel_weights = 1.0 + chroma * chroma_weight
-
-    # Sample pixels for seed points (for performance)
-    # Weight sampling by chroma to start from vivid colors
-    n_seeds = min(200, n_samples)
-    rng = np.random.default_rng(42)
-    sample_probs = pixel_weights / pixel_weights.sum()
-    seed_indices = rng.choice(n_samples, n_seeds, replace=False, p=sample_probs)
-    seeds = pixels[seed_indices].copy()
+if TYPE_CHECKING:
+    import numpy as np
+    from numpy.typing import NDArray
+    from PIL import Image
 
-    # Shift each seed to its mode
-    modes = []
-    for seed in seeds:
-        point = seed.copy()
+    from app.core.palette_store import PaletteStore
+    from app.utils.color_tokens import ColorTokenIndex
 
-        for _ in range(max_iterations):
-            # Calculate distances to all pixels
-            distances = np.sqrt(np.sum((pixels - point) ** 2, axis=1))
+router = APIRouter()
+logger = get_logger(__name__)
 
-            # Gaussian kernel weights combined with chroma weights
-            kernel_weights = np.exp(-0.5 * (distances / bandwidth) ** 2)
-            weights = kernel_weights * pixel_weights
-            weights_sum = weights.sum()
 
-            if weights_sum == 0:
-                break
+# Security limits (match frontend validation)
+# Note: File size is validated by UploadSizeLimitMiddleware
+MAX_DIMENSION = 4096  # 4096x4096 pixels
+MAX_PIXELS = MAX_DIMENSION * MAX_DIMENSION  # ~16.7M pixels
 
-            # Shift towards weighted mean (saturated colors pull harder)
-            new_point = np.sum(pixels * weights[:, np.newaxis], axis=0) / weights_sum
+# Largest palette in the hierarchy returned with palettes=true
+MAX_COLORS = 10
 
-            # Check convergence
-            shift = np.sqrt(np.sum((new_point - point) ** 2))
-            point = new_point
 
-            if shift < convergence_threshold:
-                break
+def decode_and_validate_image(
+    image_data: bytes, max_pixels: int = MAX_PIXELS, max_dimension: int = MAX_DIMENSION
+) -> "Image.Image":
+    """Decode and validate image (runs in threadpool)."""
+    from PIL import Image
 
-        modes.append(point)
+    # Set PIL decompression bomb protection
+    Image.MAX_IMAGE_PIXELS = max_pixels
 
-    modes_array: NDArray[np.float64] = np.array(modes)
+    # Open image (will raise DecompressionBombError if too large)
+    img = Image.open(BytesIO(image_data))
 
-    # Merge nearby modes
-    merged_modes: list[NDArray[np.float64]] = []
-    used = np.zeros(len(modes_array), dtype=bool)
+    # Additional dimension check
+    if img.width > max_dimension or img.height > max_dimension:
+        logger.warning("Image dimensions too large: %dx%d", img.width, img.height)
+        raise HTTPException(
+            status_code=400,
+            detail=f"Image dimensions must be {max_dimension}x{max_dimension} or smaller",
+        )
 
-    for i in range(len(modes_array)):
-        if used[i]:
-            continue
+    return img
 
-        # Find all modes within bandwidth
-        distances = np.sqrt(np.sum((modes_array - modes_array[i]) ** 2, axis=1))
-        nearby = distances < bandwidth
 
-        # Average nearby modes
-        merged_mode = modes_array[nearby].mean(axis=0)
-        merged_modes.append(merged_mode)
-        used[nearby] = True
+async def read_upload_image(file: UploadFile, client: str) -> "Image.Image":
+    """Validate an uploaded image and decode it in the client's scheduler queue.
 
-    centers = np.array(merged_modes)
+    Raises:
+        HTTPException: If the upload is not a valid image
+    """
+    # Validate file type
+    if not file.content_type or not file.content_type.startswith("image/"):
+        logger.warning("Invalid file type: %s", file.content_type)
+        raise HTTPException(status_code=400, detail="File must be an image")
 
-    # Limit to max_clusters by keeping largest clusters
-    if len(centers) > max_clusters:
-        # Assign pixels to get cluster sizes
-        distances = np.array([np.sqrt(np.sum((pixels - c) ** 2, axis=1)) for c in centers])
-        temp_labels = np.argmin(distances, axis=0)
+    # Read file contents (size already validated by middleware)
+    contents = await file.read()
+
+    # Validate magic number (security: defense in depth)
+    error = validate_image_magic_number(contents)
+    if error:
+        logger.warning("Magic number validation failed: %s", error)
+        raise HTTPException(status_code=400, detail=error)
+
+    # Decode and validate image off the event loop
+    # (Pillow decode is CPU-heavy for multi-MB images)
+    return await run_scheduled(client, decode_and_validate_image, bytes(contents))
+
+
+async def run_extraction[**P, T](
+    client: str, profiling: bool, fn: Callable[P, T], *args: P.args, **kwargs: P.kwargs
+) -> T:
+    """Run an extraction function in the client's scheduler queue, profiled if requested."""
+    if not profiling:
+        return await run_scheduled(client, fn, *args, **kwargs)
+
+    request_id = get_request_id() or "no-request-id"
+    result, report = await run_scheduled(
+        client, partial(profile_call, request_id, fn, *args, **kwargs)
+    )
+    get_profile_store().put(report)
+    logger.info(
+        "Profiled %s: %.0f ms, tracemalloc peak %d bytes, %d clustering run(s)",
+        report.function,
+        report.wall_ms,
+        report.tracemalloc_peak_bytes,
+        len(report.clustering),
+    )
+    return result
+
+
+def cluster_session_pixels(
+    session: ImageSession, n_clusters: int
+) -> tuple["NDArray[np.float64]", "NDArray[np.float64]", "NDArray[np.float64]"]:
+    """Cluster a session's pixels, warm-starting from its closest cached clustering.
+
+    Runs on a worker thread. Results are cached on the session per cluster count;
+    requests for the same session cluster one at a time under its lock.
+    """
+    from app.utils.color_extraction import cluster_pixels
 
-        # Count pixels per cluster
-        cluster_sizes = np.array([np.sum(temp_labels == k) for k in range(len(centers))])
+    with session.lock:
+        clustering = session.clusterings.get(n_clusters)
+        if clustering is None:
+            clustering = cluster_pixels(
+                session.pixels_oklab,
+                n_clusters,
+                init_centers=session.warm_start_centers(n_clusters),
+            )
+            get_session_store().add_clustering(session, n_clusters, clustering)
+    return clustering
 
-        # Keep top max_clusters
-        top_indices = np.argsort(cluster_sizes)[-max_clusters:]
-        centers = centers[top_indices]
 
-    # Assign all pixels to nearest center
-    distances = np.array([np.sqrt(np.sum((pixels - c) ** 2, axis=1)) for c in centers])
-    labels = np.argmin(distances, axis=0)
+async def resolve_token_index(name: str) -> "ColorTokenIndex":
+    """Look up a token set index, building the indexes on first use.
 
-    logger.info(f"Mean Shift found {len(centers)} clusters (bandwidth={bandwidth})")
+    Raises:
+        HTTPException: If no token set has that name
+    """
+    from app.utils.color_tokens import get_token_index
 
-    return centers, labels
+    try:
+        return await run_in_threadpool(get_token_index, name)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=f"Unknown token set: {name}") from e
 
 
-def extract_colors_from_image(
-    image: Image.Image,
-    num_colors: int,
-    resize_width: int = 150,
-    similarity_threshold: float = 0.15,
-) -> list[ExtractedColor]:
-    """Extract dominant colors from image using k-means++ in Oklab color space.
+async def require_palette_store() -> "PaletteStore":
+    """Open the palette store on first use.
 
-    Uses oversampling (3x clusters) then greedy selection to avoid similar colors.
+    Raises:
+        HTTPException: If PALETTE_STORE_PATH is not configured
     """
-    # Resize for performance
-    aspect_ratio = image.height / image.width
-    new_size = (resize_width, int(resize_width * aspect_ratio))
-    image = image.resize(new_size, Image.Resampling.LANCZOS)
-
-    # Get pixels as numpy array, handling transparency
-    img_array = np.array(image)
-
-    if image.mode == "RGBA":
-        # Filter out transparent pixels (alpha < 128)
-        alpha = img_array[:, :, 3]
-        mask = alpha.flatten() >= 128
-        pixels_rgb = img_array[:, :, :3].reshape(-1, 3).astype(np.float64)
-        pixels_rgb = pixels_rgb[mask]
-    else:
-        # Convert to RGB if needed
-        if image.mode != "RGB":
-            image = image.convert("RGB")
-            img_array = np.array(image)
-        pixels_rgb = img_array.reshape(-1, 3).astype(np.float64)
-
-    # Check if we have any pixels to process
-    if len(pixels_rgb) == 0:
-        return []
-
-    # Convert to Oklab for perceptually uniform clustering
-    pixels_oklab = rgb_to_oklab(pixels_rgb)
-
-    # Oversample: use 3x clusters to find more color variations
-    n_oversample = num_colors * 3
-    centers_oklab, labels = kmeans(pixels_oklab, n_clusters=n_oversample)
-
-    # Calculate cluster sizes
-    unique, counts = np.unique(labels, return_counts=True)
-    total_pixels = len(labels)
-
-    # Build cluster info: (center_oklab, center_rgb, size, percentage)
-    cluster_info = []
-    for i in range(len(centers_oklab)):
-        if i in unique:
-            idx = np.where(unique == i)[0][0]
-            size = counts[idx]
-            percentage = float((size / total_pixels) * 100)
-        else:
-            size = 0
-            percentage = 0.0
-
-        rgb = oklab_to_rgb(centers_oklab[i : i + 1])[0]
-        r = max(0, min(255, int(rgb[0])))
-        g = max(0, min(255, int(rgb[1])))
-        b = max(0, min(255, int(rgb[2])))
-        hex_color = f"#{r:02x}{g:02x}{b:02x}"
-
-        cluster_info.append(
-            {
-                "oklab": centers_oklab[i],
-                "hex": hex_color,
-                "size": size,
-                "percentage": percentage,
-            }
-        )
-
-    # Sort by cluster size (descending)
-    cluster_info.sort(key=lambda x: x["size"], reverse=True)
-
-    # Greedy selection: pick largest, skip similar colors
-    selected: list[ExtractedColor] = []
-    selected_oklab: list[NDArray[np.float64]] = []
+    from app.core.palette_store import get_palette_store
 
-    for cluster in cluster_info:
-        if len(selected) >= num_colors:
-            break
+    palette_store = await run_in_threadpool(get_palette_store)
+    if palette_store is None:
+        raise HTTPException(status_code=503, detail="Palette store is not configured")
+    return palette_store
 
-        # Check if too similar to already selected colors
-        is_similar = False
-        for sel_oklab in selected_oklab:
-            distance = np.sqrt(np.sum((cluster["oklab"] - sel_oklab) ** 2))
-            if distance < similarity_threshold:
-                is_similar = True
-                break
 
-        if not is_similar:
-            selected.append(ExtractedColor(hex=cluster["hex"], percentage=cluster["percentage"]))
-            selected_oklab.append(cluster["oklab"])
-
-    # Re-normalize percentages after filtering
-    if selected:
-        total_percentage = sum(color.percentage for color in selected)
-        if total_percentage > 0:
-            for color in selected:
-                color.percentage = round((color.percentage / total_percentage) * 100, 1)
+def with_nearest(
+    response: ColorExtractionResponse, index: "ColorTokenIndex"
+) -> ColorExtractionResponse:
+    """Return a copy of an extraction response with nearest tokens attached."""
+    from app.utils.color_tokens import attach_nearest
+
+    return response.model_copy(
+        update={
+            "colors": attach_nearest(response.colors, index),
+            "palettes": None
+            if response.palettes is None
+            else {
+                count: attach_nearest(colors, index)
+                for count, colors in response.palettes.items()
+            },
+        }
+    )
+
+
+async def with_contrast(
+    response: ColorExtractionResponse, client: str
+) -> ColorExtractionResponse:
+    """Attach the contrast matrices between the response's colors."""
+    from app.utils.contrast import palette_contrast
 
-    return selected
+    matrix = await run_scheduled(
+        client, palette_contrast, [color.hex for color in response.colors]
+    )
+    return response.model_copy(update={"contrast": matrix})
 
 
-@router.post("/extract", response_model=ColorExtractionResponse)
+@router.post(
+    "/extract", response_model=ColorExtractionResponse, response_model_exclude_none=True
+)
 async def extract_colors(
     settings: Settings = Depends(get_settings_dependency),
+    client: str = Depends(admit_client),
     file: UploadFile = File(..., description="Image file to analyze"),
     num_colors: int = Query(default=4, ge=2, le=10, description="Number of colors to extract"),
+    palettes: bool = Query(
+        default=False, description="Also return the palette for every color count (2-10)"
+    ),
+    sampling: SamplingStrategy = Query(
+        default="box", description="Pixel sampling strategy used before clustering"
+    ),
+    sample_size: int = Query(
+        default=DEFAULT_TARGET_SAMPLES,
+        ge=1_000,
+        le=100_000,
+        description="Approximate number of pixels sampled for clustering",
+    ),
+    resolution: Literal["sampled", "full"] = Query(
+        default="sampled",
+        description="Cluster a pixel sample, or every pixel within a bounded memory budget",
+    ),
+    selection: PaletteSelection = Query(
+        default="size", description="Pick the largest distinct clusters, or trade size for variety"
+    ),
+    nearest: str | None = Query(
+        default=None, description="Token set to name colors from (tailwind or a custom set)"
+    ),
+    store: bool = Query(
+        default=False, description="Save the palette to the store for similarity search"
+    ),
+    contrast: bool = Query(
+        default=False, description="Include WCAG and APCA contrast between the colors"
+    ),
+    profile: bool = Query(
+        default=False, description="Profile this request (ignored in production)"
+    ),
+    x_profile: str | None = Header(default=None, include_in_schema=False),
 ) -> ColorExtractionResponse:
     """
     Extract dominant colors from an uploaded image using k-means++ algorithm.
@@ -332,6 +264,22 @@ async def extract_colors(
     Parameters:
         file: Image file (JPEG, PNG, WebP, etc.)
         num_colors: Number of colors to extract (2-10, default: 4)
+        palettes: Return palettes for every color count from one clustering pass,
+            so clients can change the count without re-uploading
+        sampling: Pixel sampling strategy (box, nearest, grid, chroma, saliency, lanczos)
+        sample_size: Approximate number of pixels sampled for clustering
+        resolution: "full" clusters every pixel in fixed-size chunks, keeping working
+            memory under FULL_RESOLUTION_MEMORY_BUDGET_MB (slower, more accurate)
+        selection: "size" keeps the largest clusters that aren't near-duplicates;
+            "diverse" balances cluster size against distance to colors already
+            picked, surfacing small accent colors (ignored with palettes=true)
+        nearest: Name each color after its closest token in a token set
+        store: Save the palette for ``POST /api/colors/search`` (skipped if it is empty)
+        contrast: Add WCAG 2.x ratios and APCA Lc for every pair of returned colors
+        profile: Outside production, run the extraction under cProfile and
+            tracemalloc (also enabled by an ``X-Profile: 1`` header); the report is
+            available from ``GET /api/colors/profiles/{request_id}``. K-means runs
+            on one thread while profiled
 
     Returns:
         List of extracted colors with hex codes and percentages
@@ -341,66 +289,331 @@ async def extract_colors(
         Content-Type: multipart/form-data
         -> {"colors": [{"hex": "#2563eb", "percentage": 35.2}, ...]}
     """
-    logger.info("Color extraction endpoint called")
-    logger.debug("API version: %s", settings.API_VERSION)
+    from app.utils.color_extraction import (
+        extract_colors_from_image,
+        extract_colors_full_resolution,
+        extract_palette_hierarchy,
+        extract_palette_hierarchy_full_resolution,
+    )
 
-    # Validate file type
-    if not file.content_type or not file.content_type.startswith("image/"):
-        logger.warning("Invalid file type: %s", file.content_type)
-        raise HTTPException(status_code=400, detail="File must be an image")
+    logger.debug("Color extraction endpoint called (API version: %s)", settings.API_VERSION)
 
-    # Security limits (match frontend validation)
-    # Note: File size is validated by UploadSizeLimitMiddleware
-    MAX_DIMENSION = 4096  # 4096x4096 pixels
-    MAX_PIXELS = MAX_DIMENSION * MAX_DIMENSION  # ~16.7M pixels
+    profiling = settings.profiling_enabled and (profile or x_profile in ("1", "true"))
+    token_index = await resolve_token_index(nearest) if nearest else None
+    palette_store = await require_palette_store() if store else None
 
     try:
-        # Read file contents (size already validated by middleware)
-        contents = await file.read()
-
-        # Validate magic number (security: defense in depth)
-        error = validate_image_magic_number(contents)
-        if error:
-            logger.warning("Magic number validation failed: %s", error)
-            raise HTTPException(status_code=400, detail=error)
-
-        # Decode and validate image in threadpool to avoid blocking event loop
-        # (Pillow decode is CPU-heavy for multi-MB images)
-        def decode_and_validate_image(
-            image_data: bytes, max_pixels: int, max_dimension: int
-        ) -> Image.Image:
-            """Decode and validate image (runs in threadpool)."""
-            # Set PIL decompression bomb protection
-            Image.MAX_IMAGE_PIXELS = max_pixels
-
-            # Open image (will raise DecompressionBombError if too large)
-            img = Image.open(BytesIO(image_data))
-
-            # Additional dimension check
-            if img.width > max_dimension or img.height > max_dimension:
-                logger.warning("Image dimensions too large: %dx%d", img.width, img.height)
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Image dimensions must be {max_dimension}x{max_dimension} or smaller",
+        image = await read_upload_image(file, client)
+        # Upload dimensions, recorded before sampling touches the image
+        width, height = image.size
+
+        logger.info("Extracting %d colors from image (%dx%d)", num_colors, width, height)
+
+        # Extract colors (on the scheduler's pool to avoid blocking the event loop)
+        if resolution == "full":
+            memory_budget = settings.FULL_RESOLUTION_MEMORY_BUDGET_MB * 1024 * 1024
+            if palettes:
+                hierarchy = await run_extraction(
+                    client,
+                    profiling,
+                    extract_palette_hierarchy_full_resolution,
+                    image,
+                    memory_budget,
+                )
+                response = ColorExtractionResponse(
+                    colors=hierarchy[num_colors], palettes=hierarchy
+                )
+            else:
+                colors = await run_extraction(
+                    client,
+                    profiling,
+                    extract_colors_full_resolution,
+                    image,
+                    num_colors,
+                    memory_budget,
+                    selection=selection,
                 )
+                response = ColorExtractionResponse(colors=colors)
+        elif palettes:
+            hierarchy = await run_extraction(
+                client,
+                profiling,
+                extract_palette_hierarchy,
+                image,
+                sampling=sampling,
+                target_samples=sample_size,
+            )
+            response = ColorExtractionResponse(colors=hierarchy[num_colors], palettes=hierarchy)
+        else:
+            colors = await run_extraction(
+                client,
+                profiling,
+                extract_colors_from_image,
+                image,
+                num_colors,
+                sampling=sampling,
+                target_samples=sample_size,
+                selection=selection,
+            )
+            response = ColorExtractionResponse(colors=colors)
+
+        # An empty palette (e.g. a fully transparent image) can't match any search
+        if palette_store is not None and response.colors:
+            response.palette_id = await run_in_threadpool(
+                palette_store.add, response.colors, width, height, file.filename
+            )
+        if token_index is not None:
+            response = with_nearest(response, token_index)
+        if contrast:
+            response = await with_contrast(response, client)
+        return response
 
-            return img
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Color extraction failed: %s", str(e), exc_info=e)
+        raise HTTPException(status_code=400, detail="Failed to process image") from e
 
-        image = await run_in_threadpool(
-            decode_and_validate_image, bytes(contents), MAX_PIXELS, MAX_DIMENSION
-        )
 
-        logger.info(
-            "Extracting %d colors from image (%dx%d)", num_colors, image.width, image.height
-        )
+@router.post("/sessions", response_model=ColorSessionResponse)
+async def create_color_session(
+    settings: Settings = Depends(get_settings_dependency),
+    client: str = Depends(admit_client),
+    file: UploadFile = File(..., description="Image file to analyze"),
+    sampling: SamplingStrategy = Query(
+        default="box", description="Pixel sampling strategy used before clustering"
+    ),
+    sample_size: int = Query(
+        default=DEFAULT_TARGET_SAMPLES,
+        ge=1_000,
+        le=100_000,
+        description="Approximate number of pixels sampled for clustering",
+    ),
+) -> ColorSessionResponse:
+    """
+    Upload an image once for repeated color extraction.
+
+    Decodes and downscales the image, keeps its Oklab pixels in a memory-bounded
+    store, and returns a short-lived session ID for use with
+    ``GET /api/colors/sessions/{session_id}/extract``.
 
-        # Extract colors (run in threadpool to avoid blocking event loop)
-        colors = await run_in_threadpool(extract_colors_from_image, image, num_colors)
+    Example:
+        POST /api/colors/sessions
+        Content-Type: multipart/form-data
+        -> {"session_id": "k3J...", "expires_in": 600, "width": 1200, "height": 800, ...}
+    """
+    from app.utils.color_extraction import image_to_oklab
 
-        return ColorExtractionResponse(colors=colors)
+    logger.debug("Color session upload called")
 
+    try:
+        image = await read_upload_image(file, client)
+        pixels_oklab = await run_scheduled(client, image_to_oklab, image, sampling, sample_size)
+        session = get_session_store().create(pixels_oklab, image.width, image.height)
     except HTTPException:
         raise
+    except MemoryError as e:
+        logger.warning("Color session rejected: %s", str(e))
+        raise HTTPException(status_code=413, detail=str(e)) from e
     except Exception as e:
-        logger.error("Color extraction failed: %s", str(e), exc_info=e)
+        logger.error("Color session upload failed: %s", str(e), exc_info=e)
         raise HTTPException(status_code=400, detail="Failed to process image") from e
+
+    return ColorSessionResponse(
+        session_id=session.session_id,
+        expires_in=settings.SESSION_TTL_SECONDS,
+        width=session.width,
+        height=session.height,
+        pixels=len(session.pixels_oklab),
+    )
+
+
+@router.get("/sessions/stats", response_model=ColorSessionStatsResponse)
+async def color_session_stats() -> ColorSessionStatsResponse:
+    """Report the number of live sessions and the memory they hold."""
+    return ColorSessionStatsResponse(**get_session_store().stats())
+
+
+@router.get(
+    "/sessions/{session_id}/extract",
+    response_model=ColorExtractionResponse,
+    response_model_exclude_none=True,
+)
+async def extract_session_colors(
+    session_id: str,
+    client: str = Depends(admit_client),
+    num_colors: int = Query(default=4, ge=2, le=10, description="Number of colors to extract"),
+    palettes: bool = Query(
+        default=False, description="Also return the palette for every color count (2-10)"
+    ),
+    selection: PaletteSelection = Query(
+        default="size", description="Pick the largest distinct clusters, or trade size for variety"
+    ),
+    contrast: bool = Query(
+        default=False, description="Include WCAG and APCA contrast between the colors"
+    ),
+) -> ColorExtractionResponse:
+    """
+    Extract dominant colors from an image uploaded with ``POST /api/colors/sessions``.
+
+    Reuses the session's decoded Oklab pixels and caches results per parameter
+    set, so repeated calls skip upload, decode and conversion entirely.
+
+    Example:
+        GET /api/colors/sessions/k3J.../extract?num_colors=6
+        -> {"colors": [{"hex": "#2563eb", "percentage": 35.2}, ...]}
+    """
+    from app.utils.color_extraction import build_palette_hierarchy, select_palette
+
+    session = get_session_store().get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found or expired")
+
+    if palettes:
+        hierarchy: dict[int, list[ExtractedColor]] | None = session.results.get("palettes")
+        if hierarchy is None:
+            centers, sizes, masses = await run_scheduled(
+                client, cluster_session_pixels, session, MAX_COLORS * 3
+            )
+            hierarchy = build_palette_hierarchy(centers, sizes, masses)
+            session.results["palettes"] = hierarchy
+        response = ColorExtractionResponse(colors=hierarchy[num_colors], palettes=hierarchy)
+    else:
+        colors: list[ExtractedColor] | None = session.results.get(
+            ("colors", num_colors, selection)
+        )
+        if colors is None:
+            centers, sizes, _ = await run_scheduled(
+                client, cluster_session_pixels, session, num_colors * 3
+            )
+            colors = select_palette(centers, sizes, num_colors, selection=selection)
+            session.results[("colors", num_colors, selection)] = colors
+        response = ColorExtractionResponse(colors=colors)
+
+    if contrast:
+        response = await with_contrast(response, client)
+    return response
+
+
+@router.post("/nearest", response_model=NearestColorResponse)
+async def nearest_colors(
+    request: NearestColorRequest, client: str = Depends(admit_client)
+) -> NearestColorResponse:
+    """
+    Match colors to their nearest named tokens in one vectorized lookup.
+
+    Accepts up to 10,000 colors per call. Distances are Euclidean in Oklab.
+
+    Example:
+        POST /api/colors/nearest
+        {"colors": ["#2563eb", "#ff0000"], "token_set": "tailwind"}
+        -> {"token_set": "tailwind", "matches": [
+               {"token": "blue-600", "hex": "#2563eb", "delta_e": 0.0, "color": "#2563eb"},
+               {"token": "red-500", "hex": "#ef4444", "delta_e": 0.053, "color": "#ff0000"}]}
+    """
+    from app.utils.color_tokens import match_colors
+
+    index = await resolve_token_index(request.token_set)
+    matches = await run_scheduled(client, match_colors, index, request.colors)
+    return NearestColorResponse(token_set=request.token_set, matches=matches)
+
+
+@router.post("/contrast", response_model=ContrastResponse, response_model_exclude_none=True)
+async def contrast_colors(
+    request: ContrastRequest, client: str = Depends(admit_client)
+) -> ContrastResponse:
+    """
+    Compute WCAG 2.x or APCA contrast between every pair of colors.
+
+    Without ``min_contrast`` the full matrix is returned (up to 256 colors).
+    With it, up to 5,000 colors are compared and only the pairs reaching the
+    threshold come back, highest contrast first, capped at ``limit``.
+
+    Example:
+        POST /api/colors/contrast
+        {"colors": ["#ffffff", "#2563eb", "#111827"], "min_contrast": 4.5}
+        -> {"colors": [...], "metric": "wcag", "total_pairs": 2, "pairs": [
+               {"foreground": "#ffffff", "background": "#111827", "contrast": 17.74},
+               {"foreground": "#ffffff", "background": "#2563eb", "contrast": 5.17}]}
+    """
+    from app.utils.color_tokens import normalize_hex
+    from app.utils.contrast import contrast_matrix, contrast_pairs
+
+    colors = [normalize_hex(color) for color in request.colors]
+
+    if request.min_contrast is None:
+        if len(colors) > MAX_CONTRAST_MATRIX_COLORS:
+            raise HTTPException(
+                status_code=400,
+                detail=(
+                    f"Pass min_contrast to compare more than {MAX_CONTRAST_MATRIX_COLORS} colors"
+                ),
+            )
+        matrix = await run_scheduled(client, contrast_matrix, colors, request.metric)
+        return ContrastResponse(colors=colors, metric=request.metric, matrix=matrix)
+
+    pairs, total = await run_scheduled(
+        client, contrast_pairs, colors, request.metric, request.min_contrast, request.limit
+    )
+    return ContrastResponse(
+        colors=colors, metric=request.metric, pairs=pairs, total_pairs=total
+    )
+
+
+@router.post(
+    "/search", response_model=PaletteSearchResponse, response_model_exclude_none=True
+)
+async def search_palettes(
+    request: PaletteSearchRequest, client: str = Depends(admit_client)
+) -> PaletteSearchResponse:
+    """
+    Find stored images whose palette is closest to a color or palette.
+
+    Palettes saved with ``store=true`` are ranked by a symmetric weighted
+    nearest-color distance in Oklab: how close each query color is to the
+    image's palette, and how close the image's colors (weighted by share) are
+    to the query.
+
+    Example:
+        POST /api/colors/search
+        {"colors": [{"hex": "#2563eb", "weight": 2}, {"hex": "#f59e0b"}], "limit": 5}
+        -> {"total": 18234, "results": [{"id": 42, "filename": "hero.jpg",
+               "distance": 0.0312, "colors": [...], ...}, ...]}
+    """
+    palette_store = await require_palette_store()
+    results = await run_scheduled(
+        client,
+        palette_store.search,
+        [color.hex for color in request.colors],
+        [color.weight for color in request.colors],
+        request.limit,
+    )
+    total = await run_in_threadpool(palette_store.count)
+    return PaletteSearchResponse(total=total, results=results)
+
+
+@router.get("/profiles/{request_id}", response_model=ProfileReport)
+async def get_extraction_profile(
+    request_id: str,
+    settings: Settings = Depends(get_settings_dependency),
+) -> ProfileReport:
+    """
+    Return the profile of an extraction request made with ``profile=true``.
+
+    Only available outside production. Reports are kept for the 50 most
+    recent profiled requests.
+
+    K-means runs on a single thread while profiled (cProfile only sees its own
+    thread), so timings don't include KMEANS_WORKERS parallelism. tracemalloc
+    is process-wide: the memory peak includes allocations by any requests that
+    ran at the same time, and is exact only for a request running alone.
+
+    Example:
+        GET /api/colors/profiles/550e8400-e29b-41d4-a716-446655440000
+        -> {"wall_ms": 412.3, "tracemalloc_peak_bytes": 9038633,
+            "clustering": [{"algorithm": "kmeans", "iterations": 100, ...}], ...}
+    """
+    report = get_profile_store().get(request_id) if settings.profiling_enabled else None
+    if report is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return report
@@ -1,16 +1,27 @@
-"""Health check endpoint.
+"""Health check endpoints.
 
 No authentication required - used by load balancers and monitoring systems.
+``/`` is a cheap liveness check; ``/ready`` reports whether the instance should
+receive traffic; ``/scheduler`` shows how queued extraction work is spread
+across clients.
 """
 
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response, status
 
 from app.core.config import Settings
 from app.core.logging import get_logger
+from app.core.monitoring import get_loop_monitor, threadpool_stats
+from app.core.scheduler import get_scheduler
 from app.dependencies import get_settings_dependency
-from app.schemas.health import HealthResponse
+from app.schemas.health import (
+    HealthResponse,
+    LoopLag,
+    ReadinessResponse,
+    SchedulerStatsResponse,
+    ThreadpoolOccupancy,
+)
 
 router = APIRouter()
 logger = get_logger(__name__)
@@ -35,3 +46,64 @@ async def health_check(
         version=settings.API_VERSION,
         environment=settings.ENVIRONMENT,
     )
+
+
+@router.get(
+    '/ready',
+    response_model=ReadinessResponse,
+    responses={503: {'model': ReadinessResponse, 'description': 'Instance is degraded'}},
+)
+async def readiness_check(
+    response: Response,
+    settings: Settings = Depends(get_settings_dependency),
+) -> ReadinessResponse:
+    """
+    Readiness check endpoint.
+
+    Reports degraded (HTTP 503) when recent event-loop lag, the threadpool
+    queue or the extraction scheduler's queues cross the configured thresholds,
+    so load balancers can route traffic away from overloaded instances. Lag
+    percentiles and pool occupancy are included for dashboards.
+    """
+    lag = get_loop_monitor().snapshot()
+    pool = threadpool_stats()
+    scheduler = get_scheduler().occupancy()
+
+    reasons = []
+    if lag['p95'] > settings.READINESS_MAX_LOOP_LAG_MS:
+        reasons.append(
+            f"event loop lag p95 {lag['p95']:.0f}ms > {settings.READINESS_MAX_LOOP_LAG_MS:.0f}ms"
+        )
+    if pool['waiting'] > settings.READINESS_MAX_THREADPOOL_WAITING:
+        reasons.append(
+            f"threadpool queue {pool['waiting']} > {settings.READINESS_MAX_THREADPOOL_WAITING}"
+        )
+    if scheduler.queued > settings.READINESS_MAX_SCHEDULER_QUEUED:
+        reasons.append(
+            f'scheduler queue {scheduler.queued} > {settings.READINESS_MAX_SCHEDULER_QUEUED}'
+        )
+
+    if reasons:
+        logger.warning('Readiness degraded: %s', '; '.join(reasons))
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+
+    return ReadinessResponse(
+        status='degraded' if reasons else 'ready',
+        reasons=reasons,
+        loop_lag_ms=LoopLag(**lag),
+        threadpool=ThreadpoolOccupancy(**pool),
+        scheduler=scheduler,
+    )
+
+
+@router.get('/scheduler', response_model=SchedulerStatsResponse)
+async def scheduler_stats() -> SchedulerStatsResponse:
+    """
+    Extraction scheduler metrics.
+
+    Lists each client's queue depth, running and completed jobs, rejections
+    and recent queue wait percentiles, so a backlog can be traced to the
+    clients causing it. Clients are shown by a keyed hash of their API key or
+    IP; the key is random per process, so hashes change when a worker restarts.
+    """
+    return get_scheduler().snapshot()
@@ -0,0 +1,182 @@
+"""SVG optimization endpoints.
+
+Documents are optimized while they upload: the request body is fed to
+``app.utils.svg_optimizer`` chunk by chunk (on the fair scheduler's pool, queued
+per client, since parsing is CPU-bound) and the output is streamed back as it
+is produced.
+"""
+
+from collections.abc import AsyncIterator
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from starlette.requests import ClientDisconnect
+from starlette.types import Receive, Scope, Send
+
+from app.core.logging import get_logger
+from app.dependencies import admit_client, run_scheduled
+from app.middleware.upload_size import MAX_UPLOAD_SIZE
+from app.schemas.svg import DEFAULT_SVG_PRECISION, MAX_SVG_PRECISION, SvgOptimizeReport
+from app.utils.svg_optimizer import SvgOptimizer
+
+router = APIRouter()
+logger = get_logger(__name__)
+
+SVG_CONTENT_TYPES = ("image/svg+xml", "application/xml", "text/xml")
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """StreamingResponse whose content is produced while the request body is still read.
+
+    StreamingResponse normally watches ``receive`` for a disconnect while it
+    streams, which would consume body chunks the content iterator is waiting
+    for. Here the iterator reads the body itself (``request.stream()`` raises
+    ClientDisconnect), so the watcher is skipped.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError as e:
+            raise ClientDisconnect() from e
+
+        if self.background is not None:
+            await self.background()
+
+
+async def read_body(request: Request, max_size: int = MAX_UPLOAD_SIZE) -> AsyncIterator[bytes]:
+    """Yield the request body as it arrives, failing once it exceeds ``max_size``.
+
+    UploadSizeLimitMiddleware rejects oversized Content-Length headers up front;
+    this holds the same limit on the bytes actually received.
+
+    Raises:
+        HTTPException: If the body is larger than ``max_size``
+    """
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > max_size:
+            logger.warning("SVG upload exceeded %d bytes while streaming", max_size)
+            raise HTTPException(
+                status_code=413,
+                detail=f"Upload size must be less than {max_size / (1024 * 1024):.0f}MB",
+            )
+        if chunk:
+            yield chunk
+
+
+async def stream_optimized(
+    optimizer: SvgOptimizer, body: AsyncIterator[bytes], head: bytes, client: str
+) -> AsyncIterator[bytes]:
+    """Yield the output produced so far, then optimize the rest of the body."""
+    yield head
+    try:
+        async for chunk in body:
+            output = await run_scheduled(client, optimizer.feed, chunk)
+            if output:
+                yield output
+        if not optimizer.closed:
+            yield await run_scheduled(client, optimizer.close)
+    except (ValueError, HTTPException) as e:
+        # Bad input, but the status is already sent: end the response early
+        # instead of raising into the server's unhandled-error path. Output
+        # stops before the root element closes, leaving a document that won't
+        # parse as complete
+        logger.warning("SVG optimization failed mid-stream: %s", e)
+        return
+    except ClientDisconnect:
+        # The client went away while still uploading; nobody reads the rest
+        logger.info("Client disconnected mid-stream; SVG optimization abandoned")
+        return
+
+    report = optimizer.report()
+    logger.info(
+        "Optimized SVG: %d -> %d bytes, %d elements in %.0f ms",
+        report.input_bytes,
+        report.output_bytes,
+        report.elements,
+        report.time_ms,
+    )
+
+
+@router.post(
+    "/optimize",
+    response_model=None,
+    responses={
+        200: {
+            "description": "Optimized SVG, or the savings report with report=true",
+            "content": {
+                "image/svg+xml": {},
+                "application/json": {
+                    "schema": {"$ref": "#/components/schemas/SvgOptimizeReport"}
+                },
+            },
+        }
+    },
+)
+async def optimize_svg(
+    request: Request,
+    client: str = Depends(admit_client),
+    precision: int = Query(
+        DEFAULT_SVG_PRECISION,
+        ge=0,
+        le=MAX_SVG_PRECISION,
+        description="Decimal places kept in path data, point lists, transforms and lengths",
+    ),
+    report: bool = Query(
+        False, description="Return per-pass byte savings and timings instead of the SVG"
+    ),
+) -> DuplexStreamingResponse | SvgOptimizeReport:
+    """
+    Optimize an SVG document sent as the raw request body.
+
+    Strips comments, metadata and editor namespaces, rounds numbers, collapses
+    redundant groups and minifies attributes. The output streams back while the
+    upload is still being read, and memory stays bounded by the document's
+    nesting depth rather than its size. Upload size limits match image uploads.
+    Internal entities (as in Illustrator exports) are expanded; external and
+    parameter entities are refused.
+
+    Errors found before any output (not an SVG, malformed start) return 400.
+    Errors later in the document end the stream early, before the root
+    ``</svg>``, so clients parsing the result see it is incomplete.
+
+    Query Parameters:
+        precision: Decimal places kept in numbers (0-8, default 3)
+        report: Return an SvgOptimizeReport instead of the document
+
+    Example:
+        curl -X POST -H "Content-Type: image/svg+xml" --data-binary @art.svg \\
+            /api/svg/optimize > art.min.svg
+    """
+    content_type = request.headers.get("Content-Type", "").split(";")[0].strip().lower()
+    if content_type not in SVG_CONTENT_TYPES:
+        logger.warning("Invalid SVG content type: %s", content_type)
+        raise HTTPException(status_code=400, detail="Body must be an SVG document (image/svg+xml)")
+
+    optimizer = SvgOptimizer(precision=precision)
+    body = read_body(request)
+    try:
+        if report:
+            async for chunk in body:
+                await run_scheduled(client, optimizer.feed, chunk)
+            await run_scheduled(client, optimizer.close)
+            return optimizer.report()
+
+        # Parse up to the first output so documents that are invalid from the
+        # start still get a proper error status
+        head = b""
+        async for chunk in body:
+            head = await run_scheduled(client, optimizer.feed, chunk)
+            if head:
+                break
+        else:
+            head = await run_scheduled(client, optimizer.close)
+    except ValueError as e:
+        logger.warning("SVG optimization failed: %s", str(e))
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+    return DuplexStreamingResponse(
+        stream_optimized(optimizer, body, head, client), media_type="image/svg+xml"
+    )
@@ -1,10 +1,40 @@
 """Application configuration using Pydantic Settings."""
 
-from functools import lru_cache
+import math
+from functools import cached_property, lru_cache
+from typing import Literal
 
+from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+def parse_client_weights(value: str) -> dict[str, float]:
+    """
+    Parse comma-separated ``key:weight`` pairs into a mapping of API key to weight.
+
+    Raises:
+        ValueError: If a pair is malformed or a weight isn't a finite number above 0
+            (pairs are referred to by position, so keys stay out of the message)
+    """
+    weights = {}
+    for position, item in enumerate(value.split(','), start=1):
+        if not item.strip():
+            continue
+        key, _, raw_weight = item.strip().rpartition(':')
+        if not key:
+            raise ValueError(f'pair {position} is not in key:weight form')
+        try:
+            weight = float(raw_weight)
+        except ValueError:
+            raise ValueError(f'weight of pair {position} is not a number: {raw_weight!r}') from None
+        if not math.isfinite(weight) or weight <= 0:
+            raise ValueError(
+                f'weight of pair {position} must be a finite number above 0, got {weight}'
+            )
+        weights[key] = weight
+    return weights
+
+
 class Settings(BaseSettings):
     """Application settings."""
 
@@ -22,11 +52,75 @@ class Settings(BaseSettings):
 
     # Logging
     LOG_LEVEL: str = 'INFO'
+    LOG_FORMAT: Literal['text', 'json'] = 'text'
+    # Format and write log records on a background thread instead of the event loop
+    LOG_QUEUE: bool = False
+
+    # Readiness: event-loop lag sampling and degradation thresholds
+    LOOP_LAG_SAMPLE_INTERVAL_MS: int = 100
+    LOOP_LAG_WINDOW_SECONDS: int = 60
+    READINESS_MAX_LOOP_LAG_MS: float = 250
+    READINESS_MAX_THREADPOOL_WAITING: int = 8
+    READINESS_MAX_SCHEDULER_QUEUED: int = 32
+
+    # Startup: run a tiny extraction so the first real request skips lazy imports
+    WARMUP_ON_STARTUP: bool = False
+
+    # Multi-process server (python -m app.server)
+    HOST: str = '0.0.0.0'
+    PORT: int = 8000
+    # Proxies trusted to set X-Forwarded-For (comma-separated IPs/networks, or *)
+    FORWARDED_ALLOW_IPS: str = '127.0.0.1'
+    # 0 sizes the pool from the CPUs available to the process. Image sessions and
+    # profile reports are per-worker memory, so keep 1 if clients use them
+    WORKERS: int = 1
+    # Recycle a worker after this many requests (plus up to JITTER, so workers
+    # don't all restart at once) or once its RSS exceeds WORKER_MAX_RSS_MB; 0 disables
+    WORKER_MAX_REQUESTS: int = 10000
+    WORKER_MAX_REQUESTS_JITTER: int = 1000
+    WORKER_MAX_RSS_MB: int = 1024
+
+    # Threads per k-means run (1 = serial); results don't depend on this.
+    # Keep WORKERS * KMEANS_WORKERS near the CPU count to avoid oversubscription
+    KMEANS_WORKERS: int = 1
+
+    # Fair scheduling of extraction work across clients (app.core.scheduler).
+    # Threads for decode/clustering work; 0 = one per available CPU
+    SCHEDULER_WORKERS: int = 0
+    # round_robin: clients take turns; weighted: share of thread time by weight
+    SCHEDULER_POLICY: Literal['round_robin', 'weighted'] = 'weighted'
+    # Per-client limits. Clients are told apart by IP, so behind a proxy that
+    # isn't in FORWARDED_ALLOW_IPS all anonymous users count as one client:
+    # the in-flight cap and rate limit are opt-in (0 disables) for that reason
+    SCHEDULER_MAX_IN_FLIGHT_PER_CLIENT: int = 0
+    SCHEDULER_MAX_QUEUE_PER_CLIENT: int = 100
+    # Token bucket per client: sustained requests per second and burst
+    SCHEDULER_RATE_PER_SECOND: float = 0
+    SCHEDULER_BURST: int = 30
+    # Known API keys (X-API-Key) with their fair-share weight, as key:weight pairs
+    # separated by commas; other requests are identified by client IP with weight 1
+    SCHEDULER_CLIENT_WEIGHTS: str = ''
+
+    # Nearest-color matching: extra design-token sets as comma-separated JSON
+    # file paths; each set is named after its file stem (tailwind is built in)
+    COLOR_TOKEN_FILES: str = ''
+
+    # Palette store for similarity search (directory; empty disables store=true)
+    PALETTE_STORE_PATH: str = ''
+
+    # Image sessions (upload once, analyze many times)
+    SESSION_TTL_SECONDS: int = 600
+    SESSION_MAX_MEMORY_MB: int = 256
+
+    # Full-resolution extraction (working memory per request, excluding the decoded image)
+    FULL_RESOLUTION_MEMORY_BUDGET_MB: int = 64
 
     model_config = SettingsConfigDict(
         env_file='.env',
         env_file_encoding='utf-8',
         case_sensitive=True,
+        # Values can hold API keys, which shouldn't end up in startup errors
+        hide_input_in_errors=True,
     )
 
     @property
@@ -34,11 +128,33 @@ class Settings(BaseSettings):
         """Convert comma-separated origins to list."""
         return [origin.strip() for origin in self.ALLOWED_ORIGINS.split(',')]
 
+    @property
+    def color_token_files_list(self) -> list[str]:
+        """Convert comma-separated token file paths to list."""
+        return [path.strip() for path in self.COLOR_TOKEN_FILES.split(',') if path.strip()]
+
+    @field_validator('SCHEDULER_CLIENT_WEIGHTS')
+    @classmethod
+    def validate_client_weights(cls, value: str) -> str:
+        """Reject malformed pairs and unusable weights when settings load."""
+        parse_client_weights(value)
+        return value
+
+    @cached_property
+    def scheduler_client_weights(self) -> dict[str, float]:
+        """Mapping of known API key to fair-share weight (parsed once)."""
+        return parse_client_weights(self.SCHEDULER_CLIENT_WEIGHTS)
+
     @property
     def docs_enabled(self) -> bool:
         """Enable API docs only in development."""
         return self.ENVIRONMENT != 'production'
 
+    @property
+    def profiling_enabled(self) -> bool:
+        """Allow per-request profiling only outside production."""
+        return self.ENVIRONMENT != 'production'
+
 
 @lru_cache
 def get_settings() -> Settings:
@@ -1,17 +1,22 @@
 """Logging utilities with request ID support."""
 
+import atexit
+import json
 import logging
-from collections.abc import Sequence
+import queue
+import sys
 from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
 from typing import Any
 
 # Context variable to store request ID across async context
 request_id_var: ContextVar[str | None] = ContextVar('request_id', default=None)
 
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] - %(message)s'
 
-def _has_request_id_filter(filters: Sequence[Any]) -> bool:
-    """Check if RequestIDFilter is already attached."""
-    return any(isinstance(f, RequestIDFilter) for f in filters)
+# Background listener used in queue mode (None when logging synchronously)
+_queue_listener: QueueListener | None = None
 
 
 class RequestIDFilter(logging.Filter):
@@ -28,23 +33,61 @@ class RequestIDFilter(logging.Filter):
         return True
 
 
+class JSONFormatter(logging.Formatter):
+    """
+    Formatter that renders each record as a single-line JSON object.
+
+    Example:
+        {"timestamp": "2025-01-01T00:00:00.000+00:00", "level": "INFO",
+         "logger": "app.api.colors", "request_id": "550e8400-...", "message": "..."}
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Format record as JSON."""
+        payload: dict[str, Any] = {
+            'timestamp': datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec='milliseconds'
+            ),
+            'level': record.levelname,
+            'logger': record.name,
+            'request_id': getattr(record, 'request_id', 'no-request-id'),
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            payload['exception'] = self.formatException(record.exc_info)
+        if record.stack_info:
+            payload['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Queue handler that leaves message formatting to the listener thread.
+
+    The standard QueueHandler formats each record before enqueueing it, which
+    keeps string formatting on the calling thread (the event loop). Records stay
+    in-process here, so they can be passed through untouched.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Return the record as-is; the listener's handler formats it."""
+        return record
+
+
 def get_logger(name: str) -> logging.Logger:
     """
     Get a logger with request ID support.
 
+    The request ID is added once per record by the filter on the root handler
+    installed by configure_logging().
+
     Args:
         name: Logger name (typically __name__)
 
     Returns:
-        Logger instance with request ID filter
+        Logger instance
     """
-    logger = logging.getLogger(name)
-
-    # Add request ID filter if not already added
-    if not _has_request_id_filter(logger.filters):
-        logger.addFilter(RequestIDFilter())
-
-    return logger
+    return logging.getLogger(name)
 
 
 def set_request_id(request_id: str) -> None:
@@ -67,25 +110,54 @@ def get_request_id() -> str | None:
     return request_id_var.get()
 
 
-def configure_logging(level: str = 'INFO') -> None:
+def configure_logging(level: str = 'INFO', fmt: str = 'text', use_queue: bool = False) -> None:
     """
     Configure application-wide logging with request ID support.
 
     Args:
         level: Log level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
+        fmt: Output format, 'text' or 'json'
+        use_queue: Hand records to a background thread for formatting and I/O,
+            so logging calls on the event loop only enqueue
     """
-    logging.basicConfig(
-        level=level,
-        format='%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] - %(message)s',
-        force=True,
-    )
-
-    # Ensure root logger and its handlers add request_id to all records, including
-    # third-party loggers that don't use get_logger()
+    shutdown_logging()
+
+    # Skip per-record lookups that neither format uses
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
+    formatter = JSONFormatter() if fmt == 'json' else logging.Formatter(TEXT_FORMAT)
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(formatter)
+
+    root_handler: logging.Handler = stream_handler
+    if use_queue:
+        global _queue_listener
+        log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+        root_handler = DeferredQueueHandler(log_queue)
+        _queue_listener = QueueListener(log_queue, stream_handler)
+        _queue_listener.start()
+
+    # The request ID must be read on the calling thread (the context variable
+    # is not visible to the listener), and only once per record: a single
+    # filter on the one root handler covers every propagated record, including
+    # third-party loggers
+    root_handler.addFilter(RequestIDFilter())
+
     root_logger = logging.getLogger()
-    if not _has_request_id_filter(root_logger.filters):
-        root_logger.addFilter(RequestIDFilter())
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+        handler.close()
+    root_logger.addHandler(root_handler)
+    root_logger.setLevel(level)
+
+
+def shutdown_logging() -> None:
+    """Flush and stop the background listener if queue mode is active."""
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
+
 
-    for handler in root_logger.handlers:
-        if not _has_request_id_filter(handler.filters):
-            handler.addFilter(RequestIDFilter())
+atexit.register(shutdown_logging)
@@ -0,0 +1,124 @@
+"""Runtime load gauges: event-loop lag, threadpool occupancy and process memory.
+
+Used by the readiness endpoint so load balancers can stop routing traffic to an
+instance whose event loop is starved or whose threadpool is saturated.
+"""
+
+import asyncio
+import math
+import os
+import sys
+from collections import deque
+from functools import lru_cache
+
+import anyio.to_thread
+
+from app.core.config import get_settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class LoopLagMonitor:
+    """
+    Background task that measures how late the event loop wakes up.
+
+    Every ``interval`` seconds the task sleeps and records how much longer than
+    requested the sleep took. Blocking work on the loop shows up directly as lag.
+    """
+
+    def __init__(self, interval: float, window: float) -> None:
+        """
+        Initialize lag monitor.
+
+        Args:
+            interval: Seconds between samples
+            window: Seconds of samples kept for percentiles
+        """
+        self.interval = interval
+        self._samples: deque[float] = deque(maxlen=max(1, math.ceil(window / interval)))
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        """Start sampling on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name='loop-lag-monitor')
+
+    async def stop(self) -> None:
+        """Stop sampling."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self._samples.append(max(0.0, loop.time() - start - self.interval))
+
+    def snapshot(self) -> dict[str, float]:
+        """Return current lag and recent percentiles in milliseconds."""
+        samples = sorted(self._samples)
+        if not samples:
+            return {'current': 0.0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'max': 0.0}
+
+        def percentile(q: float) -> float:
+            return samples[min(len(samples) - 1, int(q * len(samples)))] * 1000
+
+        return {
+            'current': self._samples[-1] * 1000,
+            'p50': percentile(0.50),
+            'p95': percentile(0.95),
+            'p99': percentile(0.99),
+            'max': samples[-1] * 1000,
+        }
+
+
+def threadpool_stats() -> dict[str, int]:
+    """
+    Return occupancy of the AnyIO threadpool used by run_in_threadpool.
+
+    Must be called from within the event loop.
+    """
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    return {
+        'busy': int(limiter.borrowed_tokens),
+        'capacity': int(limiter.total_tokens),
+        'waiting': limiter.statistics().tasks_waiting,
+    }
+
+
+def usable_cpus() -> int:
+    """Return the number of CPUs this process may run on."""
+    # Respect CPU affinity (containers, taskset) where the platform exposes it
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+
+def process_rss_bytes() -> int:
+    """Return the resident set size of the current process in bytes."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        # No procfs (macOS): fall back to peak RSS, reported in bytes there
+        import resource
+
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+@lru_cache
+def get_loop_monitor() -> LoopLagMonitor:
+    """Get the process-wide lag monitor configured from settings."""
+    settings = get_settings()
+    return LoopLagMonitor(
+        interval=settings.LOOP_LAG_SAMPLE_INTERVAL_MS / 1000,
+        window=settings.LOOP_LAG_WINDOW_SECONDS,
+    )
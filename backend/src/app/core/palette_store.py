@@ -0,0 +1,287 @@
+"""Persistent palette store with Oklab similarity search.
+
+Extraction results can be saved to a local directory holding:
+
+- ``palettes.sqlite3``: image metadata and the palette as returned to the client
+- ``palettes.f32``: a fixed-width float32 vector per palette (Oklab color and
+  weight for each slot), read through a memory map so searches scan the corpus
+  without loading it into the Python heap
+
+Imported lazily by the API (it needs NumPy), like the extraction modules.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import closing, contextmanager
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from numpy.typing import NDArray
+
+from app.core.config import get_settings
+from app.schemas.colors import ExtractedColor, PaletteMatch
+from app.utils.color_conversion import rgb8_to_oklab
+from app.utils.color_tokens import hex_to_rgb8, normalize_hex
+
+# Palette slots per vector (matches the largest palette the API returns)
+PALETTE_SLOTS = 10
+# Oklab L, a, b and weight per slot
+SLOT_VALUES = 4
+ROW_BYTES = PALETTE_SLOTS * SLOT_VALUES * 4
+
+# Stored palettes scored per block, bounding temporary memory during a search
+SEARCH_BLOCK_ROWS = 8192
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS palettes (
+    id INTEGER PRIMARY KEY,
+    row INTEGER NOT NULL UNIQUE,
+    filename TEXT,
+    width INTEGER NOT NULL,
+    height INTEGER NOT NULL,
+    colors TEXT NOT NULL,
+    created_at REAL NOT NULL
+)
+"""
+
+
+def palette_vector(colors: list[ExtractedColor]) -> NDArray[np.float32]:
+    """Encode a palette as one index row: (Oklab, weight) per slot, weights summing to 1."""
+    row = np.zeros((PALETTE_SLOTS, SLOT_VALUES), dtype=np.float32)
+    colors = colors[:PALETTE_SLOTS]
+    if colors:
+        row[: len(colors), :3] = rgb8_to_oklab(hex_to_rgb8([color.hex for color in colors]))
+        weights = np.array([max(color.percentage, 0.0) for color in colors])
+        total = weights.sum()
+        row[: len(colors), 3] = weights / total if total > 0 else 1 / len(colors)
+    return row.reshape(-1)
+
+
+def palette_distances(
+    vectors: NDArray[np.float32],
+    query_oklab: NDArray[np.float64],
+    query_weights: NDArray[np.float64],
+) -> NDArray[np.float64]:
+    """
+    Symmetric weighted nearest-color distance between a query and stored palettes.
+
+    Averages two terms: each query color's distance to its nearest stored color
+    weighted by query weight (does the image contain the query colors?), and each
+    stored color's distance to its nearest query color weighted by its share of
+    the image (is the image dominated by them?).
+
+    Args:
+        vectors: (N, PALETTE_SLOTS * SLOT_VALUES) stored rows
+        query_oklab: (M, 3) query colors
+        query_weights: (M,) query weights summing to 1
+
+    Returns:
+        (N,) distances in Oklab units
+    """
+    slots = vectors.reshape(len(vectors), PALETTE_SLOTS, SLOT_VALUES)
+    stored_oklab, stored_weights = slots[:, :, :3], slots[:, :, 3]
+    query = query_oklab.astype(np.float32)
+
+    # (N, slots, M) distances between every stored and query color, expanded as
+    # |s|² - 2s·q + |q|² so the bulk of the work is one float32 matmul
+    dist_sq = (
+        np.sum(stored_oklab**2, axis=2)[:, :, np.newaxis]
+        - 2.0 * (stored_oklab @ query.T)
+        + np.sum(query**2, axis=1)
+    )
+    distances = np.sqrt(np.maximum(dist_sq, 0.0))
+
+    # Empty slots (weight 0) can't be a query color's nearest match
+    to_stored = np.where(stored_weights[:, :, np.newaxis] > 0, distances, np.inf).min(axis=1)
+    coverage = to_stored.astype(np.float64) @ query_weights
+    dominance = np.sum(stored_weights * distances.min(axis=2), axis=1, dtype=np.float64)
+    result: NDArray[np.float64] = (coverage + dominance) / 2
+    return result
+
+
+class PaletteStore:
+    """
+    SQLite metadata plus a memory-mapped float32 vector per stored palette.
+
+    Row ``i`` of the vector file belongs to the palette whose ``row`` column is
+    ``i``. Rows are allocated and written inside a SQLite write transaction, so
+    several worker processes can add palettes to the same store.
+    """
+
+    def __init__(self, directory: str | Path) -> None:
+        """
+        Open (and create if needed) a store.
+
+        Args:
+            directory: Directory holding the database and vector files
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.directory / 'palettes.sqlite3'
+        self.vectors_path = self.directory / 'palettes.f32'
+        self.vectors_path.touch(exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._vectors: np.memmap[Any, np.dtype[np.float32]] | None = None
+
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Yield a short-lived connection, committing on success."""
+        with closing(sqlite3.connect(self.db_path, timeout=30)) as conn, conn:
+            yield conn
+
+    def add(
+        self,
+        colors: list[ExtractedColor],
+        width: int,
+        height: int,
+        filename: str | None = None,
+    ) -> int:
+        """
+        Store a palette and return its ID.
+
+        Args:
+            colors: Extracted palette (largest first; at most PALETTE_SLOTS are indexed)
+            width: Image width in pixels
+            height: Image height in pixels
+            filename: Original file name, if known
+
+        Raises:
+            ValueError: If the palette has no colors, since it could never match a search
+        """
+        if not colors:
+            raise ValueError('Cannot store an empty palette')
+        vector = palette_vector(colors)
+        payload = json.dumps([color.model_dump(exclude_none=True) for color in colors])
+
+        with self._connect() as conn:
+            # Take the write lock before choosing the row so concurrent writers
+            # (threads or processes) never claim the same one
+            conn.execute('BEGIN IMMEDIATE')
+            (row,) = conn.execute('SELECT COALESCE(MAX(row) + 1, 0) FROM palettes').fetchone()
+            fd = os.open(self.vectors_path, os.O_WRONLY)
+            try:
+                os.pwrite(fd, vector.tobytes(), row * ROW_BYTES)
+            finally:
+                os.close(fd)
+            (palette_id,) = conn.execute(
+                'INSERT INTO palettes (row, filename, width, height, colors, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?) RETURNING id',
+                (row, filename, width, height, payload, time.time()),
+            ).fetchone()
+
+        return int(palette_id)
+
+    def _mapped_vectors(self) -> NDArray[np.float32]:
+        """Return the vector file mapped read-only, remapping after it has grown."""
+        rows = self.vectors_path.stat().st_size // ROW_BYTES
+        with self._lock:
+            if self._vectors is None or len(self._vectors) != rows:
+                self._vectors = (
+                    np.memmap(
+                        self.vectors_path,
+                        dtype=np.float32,
+                        mode='r',
+                        shape=(rows, PALETTE_SLOTS * SLOT_VALUES),
+                    )
+                    if rows
+                    else None
+                )
+            if self._vectors is None:
+                return np.empty((0, PALETTE_SLOTS * SLOT_VALUES), dtype=np.float32)
+            return self._vectors
+
+    def count(self) -> int:
+        """Return the number of stored palettes."""
+        with self._connect() as conn:
+            (count,) = conn.execute('SELECT COUNT(*) FROM palettes').fetchone()
+        return int(count)
+
+    def search(
+        self, query_hex: list[str], query_weights: list[float], limit: int
+    ) -> list[PaletteMatch]:
+        """
+        Rank stored palettes by distance to a query palette.
+
+        Args:
+            query_hex: Query colors as hex codes
+            query_weights: Relative importance of each query color
+            limit: Maximum number of results
+
+        Returns:
+            Stored palettes, closest first, with their ``distance``
+        """
+        query_oklab = rgb8_to_oklab(hex_to_rgb8([normalize_hex(code) for code in query_hex]))
+        weights = np.asarray(query_weights, dtype=np.float64)
+        weights = weights / weights.sum()
+
+        vectors = self._mapped_vectors()
+        if len(vectors) == 0:
+            return []
+
+        distances = np.concatenate(
+            [
+                palette_distances(vectors[start : start + SEARCH_BLOCK_ROWS], query_oklab, weights)
+                for start in range(0, len(vectors), SEARCH_BLOCK_ROWS)
+            ]
+        )
+
+        # Rows without any weighted color (failed writes, or empty palettes stored
+        # before add() rejected them) are infinitely far from every query
+        finite = np.flatnonzero(np.isfinite(distances))
+        if len(finite) == 0:
+            return []
+
+        # Over-fetch a little: rows left behind by failed writes have no metadata
+        candidates = min(len(finite), limit * 2)
+        top = finite[np.argpartition(distances[finite], candidates - 1)[:candidates]]
+        top = top[np.argsort(distances[top], kind='stable')]
+
+        rows = [int(row) for row in top]
+        with self._connect() as conn:
+            placeholders = ','.join('?' * len(rows))
+            records = conn.execute(
+                'SELECT id, row, filename, width, height, colors, created_at '
+                f'FROM palettes WHERE row IN ({placeholders})',
+                rows,
+            ).fetchall()
+
+        by_row = {record[1]: record for record in records}
+        results: list[PaletteMatch] = []
+        for row in rows:
+            record = by_row.get(row)
+            if record is None:
+                continue
+            palette_id, _, filename, width, height, colors, created_at = record
+            results.append(
+                PaletteMatch(
+                    id=palette_id,
+                    filename=filename,
+                    width=width,
+                    height=height,
+                    colors=json.loads(colors),
+                    created_at=datetime.fromtimestamp(created_at, tz=timezone.utc),
+                    distance=round(float(distances[row]), 4),
+                )
+            )
+            if len(results) == limit:
+                break
+        return results
+
+
+@lru_cache
+def get_palette_store() -> PaletteStore | None:
+    """Get the process-wide palette store, or None if PALETTE_STORE_PATH is unset."""
+    path = get_settings().PALETTE_STORE_PATH
+    return PaletteStore(path) if path else None
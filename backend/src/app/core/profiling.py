@@ -0,0 +1,153 @@
+"""Opt-in profiling of single extraction requests.
+
+Outside production, a request can ask to be profiled (``X-Profile: 1`` header or
+``profile=true`` query). The extraction then runs under cProfile and tracemalloc,
+clustering routines report their iteration counts, and the resulting report is
+stored under the request's X-Request-ID for later retrieval.
+
+cProfile only sees the thread it runs on, so profiled calls run k-means on that
+thread rather than on KMEANS_WORKERS threads: timings cover all clustering work
+but don't reflect parallel speedup. tracemalloc is process-wide, so the peak also
+counts allocations by requests running at the same time; it is exact only when
+the profiled request runs alone.
+"""
+
+import cProfile
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+from collections.abc import Callable
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any
+
+from app.schemas.profiling import ClusteringRun, FunctionStats, ProfileReport
+
+# Collector for clustering runs of the profiled call (None when not profiling)
+clustering_runs_var: ContextVar[list[ClusteringRun] | None] = ContextVar(
+    'clustering_runs', default=None
+)
+
+# Number of functions included in a report, ordered by cumulative time
+TOP_FUNCTIONS = 25
+
+# tracemalloc is process-wide, so profiled calls run one at a time
+_profile_lock = threading.Lock()
+
+
+def record_clustering_run(
+    algorithm: str,
+    n_samples: int,
+    n_clusters: int,
+    iterations: int,
+    max_iterations: int,
+    converged: bool,
+    final_shift: float,
+    warm_start: bool = False,
+) -> None:
+    """Record convergence info for a clustering run if the current call is profiled."""
+    runs = clustering_runs_var.get()
+    if runs is not None:
+        runs.append(
+            ClusteringRun(
+                algorithm=algorithm,
+                n_samples=n_samples,
+                n_clusters=n_clusters,
+                iterations=iterations,
+                max_iterations=max_iterations,
+                converged=converged,
+                final_shift=final_shift,
+                warm_start=warm_start,
+            )
+        )
+
+
+def is_profiling() -> bool:
+    """Whether the current call runs under profile_call."""
+    return clustering_runs_var.get() is not None
+
+
+def profile_call[**P, T](
+    request_id: str, fn: Callable[P, T], *args: P.args, **kwargs: P.kwargs
+) -> tuple[T, ProfileReport]:
+    """
+    Run ``fn`` under cProfile and tracemalloc (call from a worker thread).
+
+    Args:
+        request_id: Request ID the report is filed under
+        fn: Function to profile
+
+    Returns:
+        Tuple of (fn's result, profile report)
+    """
+    runs: list[ClusteringRun] = []
+    token = clustering_runs_var.set(runs)
+    profiler = cProfile.Profile()
+
+    with _profile_lock:
+        tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            result = profiler.runcall(fn, *args, **kwargs)
+        finally:
+            wall_ms = (time.perf_counter() - start) * 1000
+            _, peak_bytes = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            clustering_runs_var.reset(token)
+
+    stats = pstats.Stats(profiler)
+    raw_stats: dict[tuple[str, int, str], tuple[Any, ...]] = stats.stats  # type: ignore[attr-defined]
+    top = sorted(raw_stats.items(), key=lambda item: item[1][3], reverse=True)[:TOP_FUNCTIONS]
+
+    report = ProfileReport(
+        request_id=request_id,
+        function=getattr(fn, '__name__', repr(fn)),
+        wall_ms=wall_ms,
+        tracemalloc_peak_bytes=peak_bytes,
+        clustering=runs,
+        top_functions=[
+            FunctionStats(
+                function=f'{filename}:{line}({name})',
+                calls=primitive_calls,
+                total_ms=total_time * 1000,
+                cumulative_ms=cumulative_time * 1000,
+            )
+            for (filename, line, name), (primitive_calls, _, total_time, cumulative_time, _) in top
+        ],
+    )
+    return result, report
+
+
+class ProfileStore:
+    """Bounded in-memory store of profile reports keyed by request ID."""
+
+    def __init__(self, max_reports: int) -> None:
+        """
+        Initialize profile store.
+
+        Args:
+            max_reports: Number of most recent reports to keep
+        """
+        self.max_reports = max_reports
+        self._reports: OrderedDict[str, ProfileReport] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, report: ProfileReport) -> None:
+        """Store a report, dropping the oldest when full."""
+        with self._lock:
+            self._reports[report.request_id] = report
+            while len(self._reports) > self.max_reports:
+                self._reports.popitem(last=False)
+
+    def get(self, request_id: str) -> ProfileReport | None:
+        """Return the report for a request ID, if still stored."""
+        with self._lock:
+            return self._reports.get(request_id)
+
+
+@lru_cache
+def get_profile_store() -> ProfileStore:
+    """Get the process-wide profile store."""
+    return ProfileStore(max_reports=50)
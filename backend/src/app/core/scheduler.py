@@ -0,0 +1,409 @@
+"""Fair scheduling of CPU-bound work across clients.
+
+Decode, clustering, contrast, token matching, palette search and SVG
+optimization jobs run on a dedicated thread pool rather than the shared AnyIO
+threadpool, behind one queue per client, so a client that submits hundreds
+of requests at once can't make everyone else wait behind its backlog. Queues are
+served round-robin, or by weighted fair share of thread time: each client has a
+virtual clock that advances by the time its jobs take divided by its weight, and
+the client furthest behind goes next.
+
+Clients are identified by ``X-API-Key`` when the key is listed in
+SCHEDULER_CLIENT_WEIGHTS and by IP otherwise, so inventing keys doesn't buy a
+fresh quota. Behind a reverse proxy every anonymous client shares the proxy's
+address unless the proxy is listed in FORWARDED_ALLOW_IPS, which makes the
+server take the client IP from ``X-Forwarded-For``. Each client has a queue
+depth cap, plus an optional in-flight cap and token-bucket rate limit (both off
+by default, since they would throttle every client behind an untrusted proxy as
+one). State lives in the worker process, so with several workers the limits
+apply per worker.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import hashlib
+import hmac
+import secrets
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache, partial
+from operator import attrgetter
+from typing import Literal
+
+from app.core.config import get_settings
+from app.core.logging import get_logger
+from app.core.monitoring import usable_cpus
+from app.schemas.health import (
+    ClientQueueStats,
+    SchedulerOccupancy,
+    SchedulerStatsResponse,
+    WaitTimes,
+)
+
+logger = get_logger(__name__)
+
+SchedulerPolicy = Literal['round_robin', 'weighted']
+
+# Idle clients (nothing queued or running) are forgotten after this many seconds
+CLIENT_IDLE_SECONDS = 300
+# Recent queue waits kept per client for percentiles
+WAIT_SAMPLES = 256
+# Job duration assumed for a client's first job, and how fast the estimate adapts
+INITIAL_JOB_SECONDS = 0.1
+DURATION_SMOOTHING = 0.2
+
+
+class SchedulerRejected(Exception):
+    """Raised when a client is over its rate limit or its queue is full."""
+
+    def __init__(self, message: str, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+# Keyed per process: a plain hash of an IPv4 address (or a short key) shown on
+# GET /scheduler could be reversed by hashing every candidate
+_IDENTITY_KEY = secrets.token_bytes(32)
+
+
+def _identity_hash(value: str) -> str:
+    # Keep API keys (and addresses) out of metrics and logs
+    return hmac.new(_IDENTITY_KEY, value.encode(), hashlib.sha256).hexdigest()[:12]
+
+
+def api_key_client(api_key: str) -> str:
+    """Scheduling key of an API key client."""
+    return 'key:' + _identity_hash(api_key)
+
+
+def client_key(api_key: str | None, host: str | None, known_keys: dict[str, float]) -> str:
+    """
+    Scheduling key for a request.
+
+    Args:
+        api_key: ``X-API-Key`` header value, if any
+        host: Client IP address
+        known_keys: Configured API keys (unknown keys fall back to the IP)
+
+    Returns:
+        ``key:<hash>`` or ``ip:<hash>``
+    """
+    if api_key and api_key in known_keys:
+        return api_key_client(api_key)
+    return 'ip:' + _identity_hash(host or 'unknown')
+
+
+@dataclass(slots=True)
+class TokenBucket:
+    """Token bucket refilled at ``rate`` tokens per second, holding up to ``burst``."""
+
+    rate: float
+    burst: float
+    tokens: float
+    updated: float
+
+    def take(self, now: float) -> float:
+        """Take a token; return 0, or the seconds until one is available."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+@dataclass(slots=True, eq=False)
+class _Client:
+    key: str
+    weight: float
+    bucket: TokenBucket | None
+    last_active: float
+    # Turns waiting for a thread; each resolves to the virtual time charged
+    queue: deque[asyncio.Future[float]] = field(default_factory=deque)
+    in_flight: int = 0
+    virtual_time: float = 0.0
+    job_seconds: float = INITIAL_JOB_SECONDS
+    completed: int = 0
+    rejected: int = 0
+    waits: deque[float] = field(default_factory=lambda: deque(maxlen=WAIT_SAMPLES))
+    active: bool = False
+
+
+class FairScheduler:
+    """
+    Per-client queues in front of a thread pool for CPU-bound work.
+
+    All bookkeeping happens on the event loop thread; only the jobs themselves
+    run on the pool.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        policy: SchedulerPolicy = 'weighted',
+        max_in_flight: int = 0,
+        max_queue: int = 100,
+        rate: float = 0.0,
+        burst: int = 1,
+        weights: dict[str, float] | None = None,
+    ) -> None:
+        """
+        Initialize scheduler.
+
+        Args:
+            workers: Threads running jobs
+            policy: 'round_robin' or 'weighted' fair share
+            max_in_flight: Jobs running at once per client (0 = no cap)
+            max_queue: Jobs queued per client before requests are rejected
+            rate: Requests admitted per second per client (0 disables)
+            burst: Token bucket size
+            weights: Fair-share weight per client key (default 1)
+        """
+        self.workers = workers
+        self.policy = policy
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.rate = rate
+        self.burst = burst
+        self.weights = weights or {}
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='scheduler')
+        self._clients: dict[str, _Client] = {}
+        # Clients with queued turns, in round-robin order
+        self._active: deque[_Client] = deque()
+        self._virtual_clock = 0.0
+        self._busy = 0
+        self._last_prune = time.monotonic()
+
+    def _client(self, key: str) -> _Client:
+        now = time.monotonic()
+        if now - self._last_prune > CLIENT_IDLE_SECONDS:
+            self._prune(now)
+
+        client = self._clients.get(key)
+        if client is None:
+            bucket = (
+                TokenBucket(self.rate, self.burst, self.burst, now) if self.rate > 0 else None
+            )
+            client = _Client(key, self.weights.get(key, 1.0), bucket, now)
+            self._clients[key] = client
+        client.last_active = now
+        return client
+
+    def _prune(self, now: float) -> None:
+        self._last_prune = now
+        for key, client in list(self._clients.items()):
+            idle = not client.queue and not client.in_flight
+            if idle and now - client.last_active > CLIENT_IDLE_SECONDS:
+                del self._clients[key]
+
+    def admit(self, key: str) -> None:
+        """
+        Take a request from the client's rate limit.
+
+        Raises:
+            SchedulerRejected: If the client's token bucket is empty
+        """
+        client = self._client(key)
+        if client.bucket is None:
+            return
+        retry_after = client.bucket.take(time.monotonic())
+        if retry_after:
+            client.rejected += 1
+            raise SchedulerRejected('Rate limit exceeded', retry_after)
+
+    async def run[**P, T](
+        self, key: str, fn: Callable[P, T], *args: P.args, **kwargs: P.kwargs
+    ) -> T:
+        """
+        Run ``fn`` on the pool once it is the client's turn.
+
+        Context variables (request ID, profiling) are carried into the thread,
+        as with run_in_threadpool.
+
+        Raises:
+            SchedulerRejected: If the client's queue is full
+        """
+        loop = asyncio.get_running_loop()
+        client = self._client(key)
+        if len(client.queue) >= self.max_queue:
+            client.rejected += 1
+            # Roughly how long the client's own backlog takes to drain
+            slots = min(self.max_in_flight or self.workers, self.workers)
+            retry_after = client.job_seconds * len(client.queue) / slots
+            raise SchedulerRejected('Too many queued jobs', retry_after)
+
+        turn: asyncio.Future[float] = loop.create_future()
+        enqueued = time.monotonic()
+        client.queue.append(turn)
+        self._activate(client)
+        self._dispatch()
+        try:
+            charge = await turn
+        except asyncio.CancelledError:
+            if turn.cancelled():
+                # Still queued (or about to be skipped by _dispatch)
+                if turn in client.queue:
+                    client.queue.remove(turn)
+                    if not client.queue:
+                        self._deactivate(client)
+            else:
+                # Granted just as the request was cancelled: hand the slot back
+                self._release(client, turn.result())
+            raise
+
+        client.waits.append(time.monotonic() - enqueued)
+        started = time.monotonic()
+
+        def done(_: Future[T]) -> None:
+            duration = time.monotonic() - started
+            # The loop may already be gone if the job outlives shutdown
+            with contextlib.suppress(RuntimeError):
+                loop.call_soon_threadsafe(self._finish, client, charge, duration)
+
+        context = contextvars.copy_context()
+        job = self._executor.submit(context.run, partial(fn, *args, **kwargs))
+        job.add_done_callback(done)
+        return await asyncio.wrap_future(job)
+
+    def _activate(self, client: _Client) -> None:
+        if client.active:
+            return
+        # A client returning from idle starts at the current virtual time, so
+        # time spent idle isn't banked as credit over clients that kept working
+        client.virtual_time = max(client.virtual_time, self._virtual_clock)
+        client.active = True
+        self._active.append(client)
+
+    def _deactivate(self, client: _Client) -> None:
+        client.active = False
+        self._active.remove(client)
+
+    def _has_slot(self, client: _Client) -> bool:
+        return not self.max_in_flight or client.in_flight < self.max_in_flight
+
+    def _next_client(self) -> _Client | None:
+        if self.policy == 'round_robin':
+            for _ in range(len(self._active)):
+                client = self._active[0]
+                self._active.rotate(-1)
+                if self._has_slot(client):
+                    return client
+            return None
+
+        eligible = [client for client in self._active if self._has_slot(client)]
+        return min(eligible, key=attrgetter('virtual_time'), default=None)
+
+    def _dispatch(self) -> None:
+        """Grant turns while threads are free."""
+        while self._busy < self.workers:
+            client = self._next_client()
+            if client is None:
+                return
+            turn = client.queue.popleft()
+            if not client.queue:
+                self._deactivate(client)
+            if turn.done():
+                # Cancelled while queued
+                continue
+
+            # Charge the expected duration up front so a client can't start
+            # several jobs before the first one is accounted for
+            charge = client.job_seconds / client.weight
+            self._virtual_clock = max(self._virtual_clock, client.virtual_time)
+            client.virtual_time += charge
+            client.in_flight += 1
+            self._busy += 1
+            turn.set_result(charge)
+
+    def _release(self, client: _Client, charge: float) -> None:
+        client.in_flight -= 1
+        client.virtual_time -= charge
+        self._busy -= 1
+        self._dispatch()
+
+    def _finish(self, client: _Client, charge: float, duration: float) -> None:
+        # Settle the up-front estimate against the time the job actually took
+        client.completed += 1
+        client.virtual_time += duration / client.weight
+        client.job_seconds += DURATION_SMOOTHING * (duration - client.job_seconds)
+        self._release(client, charge)
+
+    def occupancy(self) -> SchedulerOccupancy:
+        """Return thread and queue occupancy across all clients."""
+        return SchedulerOccupancy(
+            busy=self._busy,
+            capacity=self.workers,
+            queued=sum(len(client.queue) for client in self._active),
+            clients=sum(
+                1 for client in self._clients.values() if client.queue or client.in_flight
+            ),
+        )
+
+    def snapshot(self) -> SchedulerStatsResponse:
+        """Return per-client queue depth, in-flight jobs and recent wait times."""
+        clients = [
+            ClientQueueStats(
+                client=client.key,
+                weight=client.weight,
+                queued=len(client.queue),
+                in_flight=client.in_flight,
+                completed=client.completed,
+                rejected=client.rejected,
+                wait_ms=_wait_times(client.waits),
+            )
+            for client in self._clients.values()
+        ]
+        clients.sort(key=lambda stats: (-stats.queued, -stats.in_flight, stats.client))
+        return SchedulerStatsResponse(
+            policy=self.policy,
+            occupancy=self.occupancy(),
+            max_in_flight_per_client=self.max_in_flight,
+            max_queue_per_client=self.max_queue,
+            clients=clients,
+        )
+
+    def shutdown(self) -> None:
+        """Stop the pool, dropping jobs that haven't started."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _wait_times(waits: deque[float]) -> WaitTimes:
+    samples = sorted(waits)
+    if not samples:
+        return WaitTimes(p50=0.0, p95=0.0, max=0.0)
+
+    def percentile(q: float) -> float:
+        return round(samples[min(len(samples) - 1, int(q * len(samples)))] * 1000, 2)
+
+    return WaitTimes(p50=percentile(0.50), p95=percentile(0.95), max=round(samples[-1] * 1000, 2))
+
+
+@lru_cache
+def get_scheduler() -> FairScheduler:
+    """Get the process-wide scheduler configured from settings."""
+    settings = get_settings()
+    workers = settings.SCHEDULER_WORKERS if settings.SCHEDULER_WORKERS > 0 else usable_cpus()
+
+    weights = {
+        api_key_client(api_key): weight
+        for api_key, weight in settings.scheduler_client_weights.items()
+    }
+    logger.info(
+        'Fair scheduler: %d threads, %s policy, %d known API key(s)',
+        workers,
+        settings.SCHEDULER_POLICY,
+        len(weights),
+    )
+    return FairScheduler(
+        workers=workers,
+        policy=settings.SCHEDULER_POLICY,
+        max_in_flight=settings.SCHEDULER_MAX_IN_FLIGHT_PER_CLIENT,
+        max_queue=settings.SCHEDULER_MAX_QUEUE_PER_CLIENT,
+        rate=settings.SCHEDULER_RATE_PER_SECOND,
+        burst=settings.SCHEDULER_BURST,
+        weights=weights,
+    )
@@ -0,0 +1,185 @@
+"""In-memory store for uploaded images that are analyzed more than once.
+
+Clients upload an image once and receive a short-lived session ID. Follow-up
+extraction calls reference the ID and reuse the decoded, downscaled Oklab pixels
+instead of re-uploading and re-decoding the image.
+"""
+
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
+
+from app.core.config import get_settings
+
+if TYPE_CHECKING:
+    import numpy as np
+    from numpy.typing import NDArray
+
+# Rough per-session bookkeeping cost on top of the pixel buffer
+SESSION_OVERHEAD_BYTES = 4096
+
+
+@dataclass
+class ImageSession:
+    """Pixels and cached results for one uploaded image."""
+
+    session_id: str
+    pixels_oklab: 'NDArray[np.float64]'
+    width: int
+    height: int
+    expires_at: float
+    results: dict[Any, Any] = field(default_factory=dict)
+    # (centers, sizes, masses) per cluster count, reused to warm-start other counts;
+    # only read or written while holding ``lock``
+    clusterings: dict[
+        int, tuple['NDArray[np.float64]', 'NDArray[np.float64]', 'NDArray[np.float64]']
+    ] = field(default_factory=dict)
+    # Held while clustering, so concurrent requests for one session never read
+    # the cache as it grows or compute the same count twice
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by this session, cached clusterings included."""
+        clusterings = sum(
+            int(array.nbytes) for clustering in self.clusterings.values() for array in clustering
+        )
+        return int(self.pixels_oklab.nbytes) + clusterings + SESSION_OVERHEAD_BYTES
+
+    def warm_start_centers(self, n_clusters: int) -> 'NDArray[np.float64] | None':
+        """
+        Return centers of the cached clustering closest to ``n_clusters``.
+
+        Centers are ordered largest cluster first, so truncating them to a smaller
+        count keeps the dominant colors. Returns None if nothing is cached. The
+        caller must hold ``lock``.
+        """
+        if not self.clusterings:
+            return None
+        # On ties prefer the larger clustering, which needs no new seeds
+        nearest = min(self.clusterings, key=lambda k: (abs(k - n_clusters), -k))
+        centers, sizes, _ = self.clusterings[nearest]
+        return centers[(-sizes).argsort(kind='stable')]
+
+
+class ImageSessionStore:
+    """
+    Memory-bounded session store with TTL expiry and LRU eviction.
+
+    Sessions expire ``ttl_seconds`` after their last access. When adding a
+    session would exceed ``max_bytes``, the least recently used sessions are
+    evicted first.
+    """
+
+    def __init__(self, ttl_seconds: float, max_bytes: int) -> None:
+        """
+        Initialize session store.
+
+        Args:
+            ttl_seconds: Idle lifetime of a session in seconds
+            max_bytes: Upper bound on memory held by all sessions
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._sessions: OrderedDict[str, ImageSession] = OrderedDict()
+        self._lock = threading.Lock()
+        self._memory_bytes = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def create(
+        self, pixels_oklab: 'NDArray[np.float64]', width: int, height: int
+    ) -> ImageSession:
+        """
+        Store pixels under a new session ID.
+
+        Raises:
+            MemoryError: If the session alone exceeds the store's memory limit
+        """
+        session = ImageSession(
+            session_id=secrets.token_urlsafe(16),
+            pixels_oklab=pixels_oklab,
+            width=width,
+            height=height,
+            expires_at=time.monotonic() + self.ttl_seconds,
+        )
+        if session.nbytes > self.max_bytes:
+            raise MemoryError('Image is too large to keep in a session')
+
+        with self._lock:
+            self._purge_expired()
+            while self._sessions and self._memory_bytes + session.nbytes > self.max_bytes:
+                _, evicted = self._sessions.popitem(last=False)
+                self._memory_bytes -= evicted.nbytes
+                self._evictions += 1
+            self._sessions[session.session_id] = session
+            self._memory_bytes += session.nbytes
+
+        return session
+
+    def get(self, session_id: str) -> ImageSession | None:
+        """Return a live session and extend its lifetime, or None if missing/expired."""
+        with self._lock:
+            self._purge_expired()
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            session.expires_at = time.monotonic() + self.ttl_seconds
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def add_clustering(
+        self,
+        session: ImageSession,
+        n_clusters: int,
+        clustering: tuple['NDArray[np.float64]', 'NDArray[np.float64]', 'NDArray[np.float64]'],
+    ) -> None:
+        """Cache a clustering on a session, counting it toward the store's memory use.
+
+        The caller must hold the session's lock.
+        """
+        with self._lock:
+            if n_clusters in session.clusterings:
+                return
+            session.clusterings[n_clusters] = clustering
+            # Sessions already evicted or expired are no longer counted
+            if self._sessions.get(session.session_id) is session:
+                self._memory_bytes += sum(int(array.nbytes) for array in clustering)
+
+    def stats(self) -> dict[str, int]:
+        """Return session count, memory use and eviction counters."""
+        with self._lock:
+            self._purge_expired()
+            return {
+                'sessions': len(self._sessions),
+                'memory_bytes': self._memory_bytes,
+                'memory_limit_bytes': self.max_bytes,
+                'evictions': self._evictions,
+                'expirations': self._expirations,
+            }
+
+    def _purge_expired(self) -> None:
+        """Drop expired sessions (caller must hold the lock)."""
+        now = time.monotonic()
+        # Sessions are ordered by last access, so expired ones sit at the front
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if session.expires_at > now:
+                break
+            self._sessions.popitem(last=False)
+            self._memory_bytes -= session.nbytes
+            self._expirations += 1
+
+
+@lru_cache
+def get_session_store() -> ImageSessionStore:
+    """Get the process-wide session store configured from settings."""
+    settings = get_settings()
+    return ImageSessionStore(
+        ttl_seconds=settings.SESSION_TTL_SECONDS,
+        max_bytes=settings.SESSION_MAX_MEMORY_MB * 1024 * 1024,
+    )
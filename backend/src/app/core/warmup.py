@@ -0,0 +1,41 @@
+"""Optional warm-up of the color extraction path.
+
+The extraction modules (NumPy, Pillow, the clustering code and the nearest-color
+indexes) are loaded lazily to keep cold starts fast. Deployments that prefer
+paying that cost before the first request can warm them up at startup instead.
+"""
+
+import time
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+def warm_up() -> float:
+    """
+    Import the extraction modules, run a tiny synthetic extraction and build
+    the nearest-color indexes.
+
+    Returns:
+        Seconds spent warming up
+    """
+    start = time.perf_counter()
+
+    import numpy as np
+    from PIL import Image
+
+    from app.utils.color_extraction import extract_colors_from_image
+    from app.utils.color_tokens import get_token_indexes
+
+    # 32x32 gradient: enough distinct colors to exercise clustering and selection
+    gradient = np.linspace(0, 255, 32, dtype=np.uint8)
+    pixels = np.stack(np.broadcast_arrays(gradient[:, None], gradient[None, :], 128), axis=-1)
+    extract_colors_from_image(Image.fromarray(pixels.astype(np.uint8)), num_colors=2)
+
+    # Nearest-color indexes for the built-in and configured token sets
+    get_token_indexes()
+
+    elapsed = time.perf_counter() - start
+    logger.info('Extraction warm-up finished in %.0f ms', elapsed * 1000)
+    return elapsed
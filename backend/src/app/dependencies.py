@@ -1,9 +1,19 @@
 """Dependency injection for FastAPI endpoints.
 
-This module provides lightweight dependency functions for future extensibility.
+This module provides lightweight dependency functions for future extensibility,
+plus the helpers routers use to run CPU-bound work on the fair scheduler.
 """
 
+import math
+from collections.abc import Callable
+
+from fastapi import Depends, Header, HTTPException, Request
+
 from app.core.config import Settings, get_settings
+from app.core.logging import get_logger
+from app.core.scheduler import SchedulerRejected, client_key, get_scheduler
+
+logger = get_logger(__name__)
 
 
 def get_settings_dependency() -> Settings:
@@ -20,3 +30,58 @@ def get_settings_dependency() -> Settings:
         Application settings instance
     """
     return get_settings()
+
+
+def get_client_key(
+    request: Request,
+    x_api_key: str | None = Header(default=None, description='API key for fair-share weighting'),
+) -> str:
+    """
+    Identify the client for fair scheduling.
+
+    Returns:
+        Scheduling key from a configured API key, otherwise from the client IP
+    """
+    host = request.client.host if request.client else None
+    return client_key(x_api_key, host, get_settings().scheduler_client_weights)
+
+
+def too_many_requests(e: SchedulerRejected) -> HTTPException:
+    """429 response telling the client when to retry."""
+    return HTTPException(
+        status_code=429,
+        detail=str(e),
+        headers={'Retry-After': str(max(1, math.ceil(e.retry_after)))},
+    )
+
+
+def admit_client(request: Request, client: str = Depends(get_client_key)) -> str:
+    """
+    Apply the client's rate limit and return its scheduling key.
+
+    Raises:
+        HTTPException: 429 if the client is over its rate limit
+    """
+    try:
+        get_scheduler().admit(client)
+    except SchedulerRejected as e:
+        host = request.client.host if request.client else 'unknown'
+        logger.warning('Rejected request from %s (%s): %s', host, client, e)
+        raise too_many_requests(e) from e
+    return client
+
+
+async def run_scheduled[**P, T](
+    client: str, fn: Callable[P, T], *args: P.args, **kwargs: P.kwargs
+) -> T:
+    """
+    Run CPU-bound work on the fair scheduler's pool, in the client's queue.
+
+    Raises:
+        HTTPException: 429 if the client's queue is full
+    """
+    try:
+        return await get_scheduler().run(client, fn, *args, **kwargs)
+    except SchedulerRejected as e:
+        logger.warning('Rejected job (%s): %s', client, e)
+        raise too_many_requests(e) from e
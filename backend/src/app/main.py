@@ -7,10 +7,14 @@ from fastapi import FastAPI, Request
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 
-from app.api import colors, health, ping
+from app.api import colors, health, ping, svg
 from app.core.config import get_settings
-from app.core.logging import configure_logging, get_logger
+from app.core.logging import configure_logging, get_logger, shutdown_logging
+from app.core.monitoring import get_loop_monitor
+from app.core.scheduler import get_scheduler
+from app.core.warmup import warm_up
 from app.middleware.request_id import RequestIDMiddleware
 from app.middleware.upload_size import UploadSizeLimitMiddleware
 
@@ -22,14 +26,28 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     """Application lifespan events."""
     # Startup
     settings = get_settings()
-    configure_logging(level=settings.LOG_LEVEL)
+    configure_logging(
+        level=settings.LOG_LEVEL, fmt=settings.LOG_FORMAT, use_queue=settings.LOG_QUEUE
+    )
     logger.info('Starting %s %s', settings.API_TITLE, settings.API_VERSION)
     logger.info('Environment: %s', settings.ENVIRONMENT)
 
+    if settings.WARMUP_ON_STARTUP:
+        await run_in_threadpool(warm_up)
+
+    get_loop_monitor().start()
+
     yield
 
     # Shutdown
     logger.info('Shutting down application')
+    await get_loop_monitor().stop()
+    # Only stop a scheduler that exists, rather than building one to shut down
+    if get_scheduler.cache_info().currsize:
+        get_scheduler().shutdown()
+        # A later lifespan in this process (tests, in-process load tests) gets a fresh pool
+        get_scheduler.cache_clear()
+    shutdown_logging()
 
 
 # Initialize FastAPI application
@@ -107,10 +125,11 @@ app.add_middleware(
     allow_origins=settings.allowed_origins_list,
     allow_credentials=False,
     allow_methods=['GET', 'POST'],
-    allow_headers=['Content-Type', 'x-vercel-protection-bypass'],
+    allow_headers=['Content-Type', 'x-vercel-protection-bypass', 'X-Profile', 'X-API-Key'],
 )
 
 # Include routers
 app.include_router(health.router, prefix='', tags=['health'])
 app.include_router(ping.router, prefix='/api/ping', tags=['ping'])
 app.include_router(colors.router, prefix='/api/colors', tags=['colors'])
+app.include_router(svg.router, prefix='/api/svg', tags=['svg'])
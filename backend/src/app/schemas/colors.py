@@ -1,14 +1,197 @@
+from datetime import datetime
+from typing import Annotated, Literal
+
 from pydantic import BaseModel, Field
 
+# Pixel sampling strategies, see app.utils.sampling
+SamplingStrategy = Literal['box', 'nearest', 'grid', 'chroma', 'saliency', 'lanczos']
+
+# How clusters are picked for the palette: largest first with near-duplicates
+# skipped, or a size/distinctness trade-off (maximal marginal relevance)
+PaletteSelection = Literal['size', 'diverse']
+
+# Default number of sampled pixels (the pixel count of a 150x150 image)
+DEFAULT_TARGET_SAMPLES = 150 * 150
+
+# Upper bound on colors matched by one nearest-color lookup
+MAX_NEAREST_COLORS = 10_000
+
+# Contrast metrics: WCAG 2.x contrast ratio, or APCA lightness contrast (Lc)
+ContrastMetric = Literal['wcag', 'apca']
+
+# Upper bounds on colors per contrast request: with a threshold (pairs are
+# filtered and capped) and without (the full matrix is returned)
+MAX_CONTRAST_COLORS = 5_000
+MAX_CONTRAST_MATRIX_COLORS = 256
+MAX_CONTRAST_PAIRS = 10_000
+
+HexColor = Annotated[
+    str, Field(pattern=r'^#?([0-9a-fA-F]{3}|[0-9a-fA-F]{6})$', examples=['#2563eb'])
+]
+
+
+class NearestColor(BaseModel):
+    """Closest named color in a token set."""
+
+    token: str = Field(..., description='Token name, e.g. blue-600')
+    hex: str = Field(..., description='Hex color code of the token')
+    delta_e: float = Field(..., description='Euclidean distance in Oklab (ΔEOK)')
+
 
 class ExtractedColor(BaseModel):
     """A single extracted color."""
 
     hex: str = Field(..., description='Hex color code')
     percentage: float = Field(..., description='Percentage of image pixels')
+    nearest: NearestColor | None = Field(
+        default=None, description='Closest token when requested with nearest=<token set>'
+    )
+
+
+class ContrastMatrix(BaseModel):
+    """Pairwise contrast between colors, rows and columns in color order."""
+
+    wcag: list[list[float]] = Field(..., description='WCAG 2.x contrast ratio (1-21), symmetric')
+    apca: list[list[float]] = Field(
+        ..., description='APCA Lc of the row color as text on the column color as background'
+    )
 
 
 class ColorExtractionResponse(BaseModel):
     """Color extraction result."""
 
     colors: list[ExtractedColor]
+    palettes: dict[int, list[ExtractedColor]] | None = Field(
+        default=None, description='Palettes for every color count, keyed by count'
+    )
+    palette_id: int | None = Field(
+        default=None,
+        description=(
+            'ID in the palette store when requested with store=true '
+            '(None if no colors were found)'
+        ),
+    )
+    contrast: ContrastMatrix | None = Field(
+        default=None, description='Contrast between the colors when requested with contrast=true'
+    )
+
+
+class ColorSessionResponse(BaseModel):
+    """Handle for an uploaded image kept for repeated extraction."""
+
+    session_id: str = Field(..., description='Session ID to pass to follow-up extraction calls')
+    expires_in: int = Field(..., description='Idle seconds before the session expires')
+    width: int = Field(..., description='Original image width in pixels')
+    height: int = Field(..., description='Original image height in pixels')
+    pixels: int = Field(..., description='Number of opaque pixels kept for analysis')
+
+
+class ColorSessionStatsResponse(BaseModel):
+    """Session store usage."""
+
+    sessions: int = Field(..., description='Number of live sessions')
+    memory_bytes: int = Field(..., description='Memory held by live sessions')
+    memory_limit_bytes: int = Field(..., description='Configured memory limit')
+    evictions: int = Field(..., description='Sessions evicted to stay under the memory limit')
+    expirations: int = Field(..., description='Sessions dropped after their TTL')
+
+
+class NearestColorRequest(BaseModel):
+    """Colors to match against a token set."""
+
+    colors: list[HexColor] = Field(
+        ..., min_length=1, max_length=MAX_NEAREST_COLORS, description='Hex colors to match'
+    )
+    token_set: str = Field(default='tailwind', description='Token set to match against')
+
+
+class NearestColorMatch(NearestColor):
+    """Nearest token for one requested color."""
+
+    color: str = Field(..., description='Requested color, normalized to #rrggbb')
+
+
+class NearestColorResponse(BaseModel):
+    """Nearest tokens in request order."""
+
+    token_set: str
+    matches: list[NearestColorMatch]
+
+
+class PaletteQueryColor(BaseModel):
+    """One color of a palette search query."""
+
+    hex: HexColor
+    weight: float = Field(default=1.0, gt=0, description='Relative importance of this color')
+
+
+class PaletteSearchRequest(BaseModel):
+    """Palette to search the store for."""
+
+    colors: list[PaletteQueryColor] = Field(..., min_length=1, max_length=10)
+    limit: int = Field(default=20, ge=1, le=100, description='Maximum number of results')
+
+
+class PaletteMatch(BaseModel):
+    """A stored palette ranked by similarity to the query."""
+
+    id: int = Field(..., description='Palette ID')
+    filename: str | None = Field(..., description='Original file name')
+    width: int = Field(..., description='Image width in pixels')
+    height: int = Field(..., description='Image height in pixels')
+    colors: list[ExtractedColor] = Field(..., description='Stored palette')
+    created_at: datetime = Field(..., description='When the palette was stored')
+    distance: float = Field(..., description='Weighted nearest-color distance in Oklab')
+
+
+class PaletteSearchResponse(BaseModel):
+    """Palette search results, closest first."""
+
+    total: int = Field(..., description='Number of stored palettes searched')
+    results: list[PaletteMatch]
+
+
+class ContrastRequest(BaseModel):
+    """Colors to compare for legibility."""
+
+    colors: list[HexColor] = Field(..., min_length=1, max_length=MAX_CONTRAST_COLORS)
+    metric: ContrastMetric = Field(default='wcag', description='Contrast metric')
+    min_contrast: float | None = Field(
+        default=None,
+        ge=0,
+        description=(
+            'Only return pairs at or above this contrast (WCAG ratio, or absolute APCA Lc) '
+            'instead of the full matrix'
+        ),
+        examples=[4.5],
+    )
+    limit: int = Field(
+        default=1_000,
+        ge=1,
+        le=MAX_CONTRAST_PAIRS,
+        description='Maximum number of pairs returned with min_contrast, highest contrast first',
+    )
+
+
+class ContrastPair(BaseModel):
+    """A color pair meeting the contrast threshold."""
+
+    foreground: str = Field(..., description='Text color (first of the pair for WCAG)')
+    background: str = Field(..., description='Background color')
+    contrast: float = Field(..., description='WCAG ratio, or APCA Lc (negative for light text)')
+
+
+class ContrastResponse(BaseModel):
+    """Contrast matrix, or the pairs meeting a threshold."""
+
+    colors: list[str] = Field(..., description='Requested colors, normalized to #rrggbb')
+    metric: ContrastMetric
+    matrix: list[list[float]] | None = Field(
+        default=None, description='Contrast of the row color on the column color'
+    )
+    pairs: list[ContrastPair] | None = Field(
+        default=None, description='Pairs at or above min_contrast, highest first'
+    )
+    total_pairs: int | None = Field(
+        default=None, description='Pairs at or above min_contrast before the limit'
+    )
@@ -10,3 +10,74 @@ class HealthResponse(BaseModel):
     timestamp: str = Field(..., description='Current UTC timestamp in ISO format')
     version: str = Field(..., description='API version')
     environment: str = Field(..., description='Current environment (development/production)')
+
+
+class LoopLag(BaseModel):
+    """Event-loop lag over the sampling window, in milliseconds."""
+
+    current: float = Field(..., description='Most recent sample')
+    p50: float = Field(..., description='Median lag')
+    p95: float = Field(..., description='95th percentile lag')
+    p99: float = Field(..., description='99th percentile lag')
+    max: float = Field(..., description='Maximum lag')
+
+
+class ThreadpoolOccupancy(BaseModel):
+    """Occupancy of the worker threadpool used for CPU-bound work."""
+
+    busy: int = Field(..., description='Threads currently running work')
+    capacity: int = Field(..., description='Maximum concurrent threads')
+    waiting: int = Field(..., description='Tasks queued for a free thread')
+
+
+class SchedulerOccupancy(BaseModel):
+    """Occupancy of the fair scheduler's extraction threads."""
+
+    busy: int = Field(..., description='Threads currently running extraction work')
+    capacity: int = Field(..., description='Extraction threads')
+    queued: int = Field(..., description='Jobs waiting across all client queues')
+    clients: int = Field(..., description='Clients with queued or running jobs')
+
+
+class ReadinessResponse(BaseModel):
+    """Readiness check response model."""
+
+    status: str = Field(..., description="'ready' or 'degraded'")
+    reasons: list[str] = Field(..., description='Thresholds crossed when degraded')
+    loop_lag_ms: LoopLag
+    threadpool: ThreadpoolOccupancy
+    scheduler: SchedulerOccupancy
+
+
+class WaitTimes(BaseModel):
+    """Recent queue wait times, in milliseconds."""
+
+    p50: float = Field(..., description='Median wait')
+    p95: float = Field(..., description='95th percentile wait')
+    max: float = Field(..., description='Maximum wait')
+
+
+class ClientQueueStats(BaseModel):
+    """Scheduler state for one client."""
+
+    client: str = Field(
+        ..., description="'key:' or 'ip:' followed by a keyed hash of the identity"
+    )
+    weight: float = Field(..., description='Fair-share weight')
+    queued: int = Field(..., description='Jobs waiting for a thread')
+    in_flight: int = Field(..., description='Jobs running')
+    completed: int = Field(..., description='Jobs finished')
+    rejected: int = Field(..., description='Requests refused by the rate limit or queue cap')
+    wait_ms: WaitTimes
+
+
+class SchedulerStatsResponse(BaseModel):
+    """Per-client queue depth and wait times of the fair scheduler."""
+
+    policy: str = Field(..., description="'round_robin' or 'weighted'")
+    occupancy: SchedulerOccupancy
+    max_in_flight_per_client: int = Field(
+        ..., description='Running jobs allowed per client (0 = no cap)'
+    )
+    max_queue_per_client: int = Field(..., description='Queued jobs allowed per client')
+    clients: list[ClientQueueStats] = Field(..., description='Clients, most queued first')
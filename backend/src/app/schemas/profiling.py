@@ -0,0 +1,46 @@
+"""Profiling report schemas."""
+
+from pydantic import BaseModel, Field
+
+
+class ClusteringRun(BaseModel):
+    """Convergence info for one clustering run."""
+
+    algorithm: str = Field(..., description='Clustering routine (kmeans, kmeans_chunked, ...)')
+    n_samples: int = Field(..., description='Number of pixels clustered')
+    n_clusters: int = Field(..., description='Number of clusters (or modes found)')
+    iterations: int = Field(..., description='Iterations run')
+    max_iterations: int = Field(..., description='Iteration limit')
+    converged: bool = Field(..., description='Whether the run converged before the limit')
+    final_shift: float = Field(..., description='Largest center movement in the last iteration')
+    warm_start: bool = Field(False, description='Whether the run started from given centers')
+
+
+class FunctionStats(BaseModel):
+    """cProfile statistics for one function."""
+
+    function: str = Field(..., description='file:line(function)')
+    calls: int = Field(..., description='Primitive call count')
+    total_ms: float = Field(..., description='Time spent in the function itself')
+    cumulative_ms: float = Field(..., description='Time including callees')
+
+
+class ProfileReport(BaseModel):
+    """Profile of a single extraction request."""
+
+    request_id: str = Field(..., description='X-Request-ID of the profiled request')
+    function: str = Field(..., description='Profiled extraction function')
+    wall_ms: float = Field(
+        ..., description='Wall time of the profiled call (k-means runs single-threaded)'
+    )
+    tracemalloc_peak_bytes: int = Field(
+        ...,
+        description=(
+            'Peak traced Python/NumPy allocations in the whole process during the call, '
+            'including any requests running concurrently'
+        ),
+    )
+    clustering: list[ClusteringRun] = Field(..., description='Clustering runs in call order')
+    top_functions: list[FunctionStats] = Field(
+        ..., description='Slowest functions by cumulative time'
+    )
@@ -0,0 +1,32 @@
+"""SVG optimization schemas."""
+
+from pydantic import BaseModel, Field
+
+# Decimal places kept in path data, point lists, transforms and lengths
+DEFAULT_SVG_PRECISION = 3
+MAX_SVG_PRECISION = 8
+
+
+class SvgPassReport(BaseModel):
+    """Savings attributed to one optimization pass."""
+
+    name: str = Field(..., description='Pass name, e.g. remove_metadata')
+    bytes_saved: int = Field(..., description='Bytes removed from the output by this pass')
+    time_ms: float = Field(..., description='Time spent in this pass')
+
+
+class SvgOptimizeReport(BaseModel):
+    """Result of optimizing one SVG document."""
+
+    input_bytes: int = Field(..., description='Size of the uploaded document')
+    output_bytes: int = Field(..., description='Size of the optimized document')
+    elements: int = Field(..., description='Elements parsed')
+    max_depth: int = Field(..., description='Deepest element nesting')
+    time_ms: float = Field(..., description='Total parse and optimization time')
+    passes: list[SvgPassReport] = Field(
+        ...,
+        description=(
+            'Per-pass savings; "serialization" covers the rest (whitespace inside '
+            'tags, quoting, self-closing empty elements) plus parser time'
+        ),
+    )
@@ -0,0 +1,224 @@
+"""Production launcher: a prefork pool of uvicorn workers.
+
+The parent process imports the application and runs the extraction warm-up
+before forking, so NumPy, Pillow, the conversion lookup tables and other
+module-level caches are loaded once and their pages shared copy-on-write by
+every worker. All workers accept connections from one listening socket.
+
+The kernel spreads connections across workers, so state kept in worker memory
+(image sessions, profile reports) is only found again by requests that happen
+to reach the same worker. The pool defaults to a single worker for that reason.
+
+Workers are recycled to bound memory growth from allocator fragmentation: each
+exits gracefully after ``WORKER_MAX_REQUESTS`` requests (plus a random jitter so
+the pool doesn't restart at once) or when its RSS exceeds ``WORKER_MAX_RSS_MB``,
+and the parent forks a replacement.
+
+Usage:
+    python -m app.server
+"""
+
+import os
+import random
+import signal
+import socket
+import sys
+import threading
+import time
+from types import FrameType
+
+import uvicorn
+
+from app.core.config import Settings, get_settings
+from app.core.logging import configure_logging, get_logger
+from app.core.monitoring import process_rss_bytes, usable_cpus
+from app.core.warmup import warm_up
+
+logger = get_logger(__name__)
+
+# Seconds between RSS checks in each worker
+RSS_CHECK_INTERVAL = 5.0
+
+# Seconds a worker gets to finish in-flight requests on shutdown
+GRACEFUL_SHUTDOWN_TIMEOUT = 30
+
+# Minimum seconds between forks of the same worker slot, so a worker that
+# crashes on startup doesn't turn the parent into a fork loop
+RESPAWN_BACKOFF = 1.0
+
+
+def worker_count(settings: Settings) -> int:
+    """Return the configured number of workers; 0 means one per usable CPU."""
+    if settings.WORKERS > 0:
+        return settings.WORKERS
+    return usable_cpus()
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    """Create the listening socket shared by all workers."""
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def watch_rss(server: uvicorn.Server, max_rss_bytes: int) -> None:
+    """Ask the worker to exit gracefully once its RSS exceeds ``max_rss_bytes``."""
+    while not server.should_exit:
+        time.sleep(RSS_CHECK_INTERVAL)
+        rss = process_rss_bytes()
+        if rss > max_rss_bytes:
+            logger.warning(
+                'Worker %d RSS %.0f MB exceeds %.0f MB, recycling',
+                os.getpid(),
+                rss / 2**20,
+                max_rss_bytes / 2**20,
+            )
+            server.should_exit = True
+
+
+def run_worker(sock: socket.socket, settings: Settings) -> None:
+    """Serve requests on ``sock`` until shutdown or recycling (runs in the child)."""
+    from app.main import app
+
+    limit_max_requests = None
+    if settings.WORKER_MAX_REQUESTS > 0:
+        jitter = random.randint(0, max(0, settings.WORKER_MAX_REQUESTS_JITTER))
+        limit_max_requests = settings.WORKER_MAX_REQUESTS + jitter
+
+    config = uvicorn.Config(
+        app,
+        log_level=settings.LOG_LEVEL.lower(),
+        limit_max_requests=limit_max_requests,
+        timeout_graceful_shutdown=GRACEFUL_SHUTDOWN_TIMEOUT,
+        # Client IPs from X-Forwarded-For when the proxy is trusted (per-client scheduling)
+        forwarded_allow_ips=settings.FORWARDED_ALLOW_IPS,
+    )
+    server = uvicorn.Server(config)
+
+    if settings.WORKER_MAX_RSS_MB > 0:
+        threading.Thread(
+            target=watch_rss,
+            args=(server, settings.WORKER_MAX_RSS_MB * 1024 * 1024),
+            name='rss-watchdog',
+            daemon=True,
+        ).start()
+
+    server.run(sockets=[sock])
+
+
+class Supervisor:
+    """Parent process: forks workers and replaces them when they exit."""
+
+    def __init__(self, sock: socket.socket, settings: Settings, workers: int) -> None:
+        self.sock = sock
+        self.settings = settings
+        self.workers = workers
+        self._children: dict[int, float] = {}
+        self._stopping = False
+
+    def spawn(self) -> None:
+        """Fork one worker."""
+        pid = os.fork()
+        if pid == 0:
+            # Child: leave the terminal's process group so Ctrl-C reaches only the
+            # parent, which forwards a single SIGTERM (a second signal would make
+            # uvicorn skip the graceful shutdown)
+            os.setpgid(0, 0)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            exit_code = 0
+            try:
+                run_worker(self.sock, self.settings)
+            except BaseException:
+                logger.exception('Worker %d crashed', os.getpid())
+                exit_code = 1
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+            os._exit(exit_code)
+
+        self._children[pid] = time.monotonic()
+        logger.info('Started worker %d', pid)
+
+    def stop(self, signum: int, frame: FrameType | None) -> None:
+        """Forward a shutdown signal to all workers."""
+        self._stopping = True
+        for pid in self._children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> None:
+        """Keep ``workers`` children alive until SIGTERM/SIGINT, then wait for them."""
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        for _ in range(self.workers):
+            self.spawn()
+
+        while self._children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+
+            started = self._children.pop(pid, None)
+            if started is None:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            if self._stopping:
+                logger.info('Worker %d stopped', pid)
+                continue
+
+            logger.info('Worker %d exited with code %d, replacing it', pid, code)
+            # Throttle replacements of workers that die right after starting
+            delay = RESPAWN_BACKOFF - (time.monotonic() - started)
+            if delay > 0:
+                time.sleep(delay)
+            if not self._stopping:
+                self.spawn()
+
+        logger.info('All workers stopped')
+
+
+def main() -> None:
+    """Preload the application, bind the socket and run the worker pool."""
+    settings = get_settings()
+    configure_logging(level=settings.LOG_LEVEL, fmt=settings.LOG_FORMAT)
+
+    # Import the app and fill module-level caches once, before forking
+    import app.main  # noqa: F401
+
+    warm_up()
+
+    workers = worker_count(settings)
+    if workers > 1:
+        logger.warning(
+            'Running %d workers: image sessions and profile reports are kept per worker, '
+            'so follow-up requests reaching another worker get 404',
+            workers,
+        )
+    sock = bind_socket(settings.HOST, settings.PORT)
+    logger.info(
+        'Listening on %s:%d with %d workers (pid %d)',
+        settings.HOST,
+        settings.PORT,
+        workers,
+        os.getpid(),
+    )
+
+    try:
+        Supervisor(sock, settings, workers).run()
+    finally:
+        sock.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -14,12 +14,8 @@ def linear_to_srgb(rgb: NDArray[np.float64]) -> NDArray[np.float64]:
     return np.where(rgb <= 0.0031308, rgb * 12.92, 1.055 * (rgb ** (1 / 2.4)) - 0.055)
 
 
-def rgb_to_oklab(rgb: NDArray[np.float64]) -> NDArray[np.float64]:
-    """Convert RGB (0-255) to Oklab color space."""
-    # Normalize to 0-1 and convert to linear RGB
-    rgb_normalized = rgb / 255.0
-    linear = srgb_to_linear(rgb_normalized)
-
+def linear_rgb_to_oklab(linear: NDArray[np.float64]) -> NDArray[np.float64]:
+    """Convert linear RGB (0-1) to Oklab color space."""
     # Linear RGB to LMS
     lms_l = 0.4122214708 * linear[:, 0] + 0.5363325363 * linear[:, 1] + 0.0514459929 * linear[:, 2]
     lms_m = 0.2119034982 * linear[:, 0] + 0.6806995451 * linear[:, 1] + 0.1073969566 * linear[:, 2]
@@ -37,6 +33,26 @@ def rgb_to_oklab(rgb: NDArray[np.float64]) -> NDArray[np.float64]:
     return np.column_stack([L, a, b])
 
 
+def rgb_to_oklab(rgb: NDArray[np.float64]) -> NDArray[np.float64]:
+    """Convert RGB (0-255) to Oklab color space."""
+    # Normalize to 0-1 and convert to linear RGB
+    rgb_normalized = rgb / 255.0
+    linear = srgb_to_linear(rgb_normalized)
+    return linear_rgb_to_oklab(linear)
+
+
+# Linear value of every 8-bit sRGB level, so uint8 input skips the power curve
+SRGB8_TO_LINEAR: NDArray[np.float64] = srgb_to_linear(np.arange(256, dtype=np.float64) / 255.0)
+
+
+def rgb8_to_oklab(rgb: NDArray[np.uint8]) -> NDArray[np.float64]:
+    """Convert 8-bit RGB to Oklab using a lookup table for linearization.
+
+    Produces the same values as ``rgb_to_oklab`` on the equivalent float input.
+    """
+    return linear_rgb_to_oklab(SRGB8_TO_LINEAR[rgb])
+
+
 def oklab_to_rgb(lab: NDArray[np.float64]) -> NDArray[np.float64]:
     """Convert Oklab to RGB (0-255)."""
     L, a, b = lab[:, 0], lab[:, 1], lab[:, 2]
@@ -0,0 +1,863 @@
+"""Color extraction algorithms: k-means++, mean shift and palette selection in Oklab.
+
+Kept separate from the API router so NumPy and Pillow are only imported when an
+extraction actually runs, not when the application starts.
+"""
+
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import repeat
+
+import numpy as np
+from numpy.typing import NDArray
+from PIL import Image
+
+from app.core.config import get_settings
+from app.core.logging import get_logger
+from app.core.profiling import is_profiling, record_clustering_run
+from app.schemas.colors import (
+    DEFAULT_TARGET_SAMPLES,
+    ExtractedColor,
+    PaletteSelection,
+    SamplingStrategy,
+)
+from app.utils.color_conversion import oklab_to_rgb, rgb8_to_oklab, rgb_to_oklab
+from app.utils.sampling import ALPHA_THRESHOLD, sample_pixels
+
+logger = get_logger(__name__)
+
+# Pixels in the coarse pass that seeds k-means on larger samples
+COARSE_SAMPLES = 4096
+
+# Pixels per k-means block. Fixed rather than derived from the worker count so
+# block sums, and therefore results, are identical however many threads run
+KMEANS_BLOCK_SIZE = 8192
+
+
+def chroma_weights(pixels: NDArray[np.float64], chroma_weight: float) -> NDArray[np.float64]:
+    """Per-pixel weights that favor saturated colors: 1 + chroma * factor."""
+    # Calculate chroma (saturation) for each pixel: sqrt(a² + b²)
+    chroma = np.sqrt(pixels[:, 1] ** 2 + pixels[:, 2] ** 2)
+    return 1.0 + chroma * chroma_weight
+
+
+def kmeans_plusplus_init(
+    pixels: NDArray[np.float64],
+    n_clusters: int,
+    rng: np.random.Generator,
+    initial_centers: NDArray[np.float64] | None = None,
+) -> NDArray[np.float64]:
+    """Initialize cluster centers using k-means++ algorithm.
+
+    When ``initial_centers`` is given, its first ``n_clusters`` rows are kept and
+    only the missing centers are seeded, so callers should order them by importance.
+    """
+    n_samples = pixels.shape[0]
+    centers: list[NDArray[np.float64]]
+    if initial_centers is not None and len(initial_centers) > 0:
+        centers = list(initial_centers[:n_clusters])
+    else:
+        # Choose first center randomly
+        centers = [pixels[rng.integers(n_samples)]]
+
+    # Squared distance from each pixel to its nearest center so far
+    distances = np.min([np.sum((pixels - c) ** 2, axis=1) for c in centers], axis=0)
+
+    while len(centers) < n_clusters:
+        # Choose next center with probability proportional to distance squared
+        total_dist = distances.sum()
+        if total_dist == 0:
+            # All pixels are identical to existing centers, pick randomly
+            next_idx = int(rng.integers(n_samples))
+        else:
+            probabilities = distances / total_dist
+            next_idx = int(rng.choice(n_samples, p=probabilities))
+        centers.append(pixels[next_idx])
+        distances = np.minimum(distances, np.sum((pixels - pixels[next_idx]) ** 2, axis=1))
+
+    return np.array(centers)
+
+
+def kmeans(
+    pixels: NDArray[np.float64],
+    n_clusters: int,
+    max_iterations: int = 100,
+    random_state: int = 42,
+    chroma_weight: float = 10,
+    workers: int | None = None,
+    init_centers: NDArray[np.float64] | None = None,
+) -> tuple[NDArray[np.float64], NDArray[np.intp]]:
+    """K-means clustering with k-means++ initialization and chroma weighting.
+
+    Pixels are processed in fixed-size blocks whose statistics are summed in
+    block order, so the result is identical for any number of workers.
+
+    Args:
+        pixels: Input pixels in Oklab space
+        n_clusters: Number of clusters
+        max_iterations: Maximum iterations
+        random_state: Random seed
+        chroma_weight: Weight factor for saturated colors (higher = more emphasis on vivid colors)
+        workers: Threads assigning blocks in parallel (defaults to the KMEANS_WORKERS
+            setting, or 1 under the profiler so cProfile sees every block)
+        init_centers: Warm-start centers, e.g. from a thumbnail pass or a previous
+            run with another cluster count; missing centers are seeded with k-means++
+    """
+    rng = np.random.default_rng(random_state)
+
+    pixel_weights = chroma_weights(pixels, chroma_weight)
+
+    # Initialize centers using k-means++, continuing from any warm-start centers
+    centers = kmeans_plusplus_init(pixels, n_clusters, rng, init_centers)
+
+    starts = range(0, len(pixels), KMEANS_BLOCK_SIZE)
+    pixel_blocks = [pixels[start : start + KMEANS_BLOCK_SIZE] for start in starts]
+    weight_blocks = [pixel_weights[start : start + KMEANS_BLOCK_SIZE] for start in starts]
+    if workers is None:
+        workers = 1 if is_profiling() else get_settings().KMEANS_WORKERS
+    # Small inputs stay serial, which also keeps the startup warm-up from
+    # creating threads before the prefork server forks
+    executor = _kmeans_executor(workers) if workers > 1 and len(starts) > 1 else None
+
+    labels = np.zeros(len(pixels), dtype=np.intp)
+    iterations = 0
+    converged = False
+    shift = 0.0
+    for _ in range(max_iterations):
+        iterations += 1
+        block_map = executor.map if executor is not None else map
+        block_stats = list(
+            block_map(assign_and_accumulate, pixel_blocks, weight_blocks, repeat(centers))
+        )
+
+        # Reduce in block order so floating-point sums don't depend on scheduling
+        sums = np.zeros((n_clusters, 3))
+        masses = np.zeros(n_clusters)
+        for _, block_sums, block_masses, _ in block_stats:
+            sums += block_sums
+            masses += block_masses
+        labels = np.concatenate([block_labels for block_labels, *_ in block_stats])
+
+        # Update centers using weighted mean; empty clusters keep their center
+        occupied = masses > 0
+        new_centers = centers.copy()
+        new_centers[occupied] = sums[occupied] / masses[occupied, np.newaxis]
+
+        # Check convergence
+        shift = float(np.max(np.sqrt(np.sum((new_centers - centers) ** 2, axis=1))))
+        if np.allclose(centers, new_centers):
+            converged = True
+            break
+
+        centers = new_centers
+
+    warm_start = init_centers is not None
+    logger.debug(
+        "k-means (%s start): %d iterations for %d pixels, k=%d",
+        "warm" if warm_start else "cold",
+        iterations,
+        len(pixels),
+        n_clusters,
+    )
+    record_clustering_run(
+        "kmeans",
+        len(pixels),
+        n_clusters,
+        iterations,
+        max_iterations,
+        converged,
+        shift,
+        warm_start=warm_start,
+    )
+
+    return centers, labels
+
+
+@lru_cache
+def _kmeans_executor(workers: int) -> ThreadPoolExecutor:
+    """Shared thread pool for parallel k-means (NumPy releases the GIL in the heavy steps)."""
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="kmeans")
+
+
+def mean_shift(
+    pixels: NDArray[np.float64],
+    bandwidth: float = 0.04,
+    max_iterations: int = 50,
+    convergence_threshold: float = 1e-4,
+    max_clusters: int = 10,
+    chroma_weight: float = 10,
+) -> tuple[NDArray[np.float64], NDArray[np.intp]]:
+    """Mean Shift clustering for automatic cluster detection.
+
+    Args:
+        pixels: Input pixels in Oklab space
+        bandwidth: Kernel bandwidth (larger = fewer clusters)
+        max_iterations: Maximum iterations per point
+        convergence_threshold: Stop when shift is smaller than this
+        max_clusters: Maximum number of clusters to return
+        chroma_weight: Weight factor for saturated colors (higher = more emphasis on vivid colors)
+    """
+    n_samples = len(pixels)
+
+    pixel_weights = chroma_weights(pixels, chroma_weight)
+
+    # Sample pixels for seed points (for performance)
+    # Weight sampling by chroma to start from vivid colors
+    n_seeds = min(200, n_samples)
+    rng = np.random.default_rng(42)
+    sample_probs = pixel_weights / pixel_weights.sum()
+    seed_indices = rng.choice(n_samples, n_seeds, replace=False, p=sample_probs)
+    seeds = pixels[seed_indices].copy()
+
+    # Shift each seed to its mode
+    modes = []
+    total_iterations = 0
+    unconverged_seeds = 0
+    max_final_shift = 0.0
+    for seed in seeds:
+        point = seed.copy()
+        shift = 0.0
+
+        for _ in range(max_iterations):
+            total_iterations += 1
+            # Calculate distances to all pixels
+            distances = np.sqrt(np.sum((pixels - point) ** 2, axis=1))
+
+            # Gaussian kernel weights combined with chroma weights
+            kernel_weights = np.exp(-0.5 * (distances / bandwidth) ** 2)
+            weights = kernel_weights * pixel_weights
+            weights_sum = weights.sum()
+
+            if weights_sum == 0:
+                break
+
+            # Shift towards weighted mean (saturated colors pull harder)
+            new_point = np.sum(pixels * weights[:, np.newaxis], axis=0) / weights_sum
+
+            # Check convergence
+            shift = np.sqrt(np.sum((new_point - point) ** 2))
+            point = new_point
+
+            if shift < convergence_threshold:
+                break
+        else:
+            unconverged_seeds += 1
+
+        max_final_shift = max(max_final_shift, float(shift))
+        modes.append(point)
+
+    modes_array: NDArray[np.float64] = np.array(modes)
+
+    # Merge nearby modes
+    merged_modes: list[NDArray[np.float64]] = []
+    used = np.zeros(len(modes_array), dtype=bool)
+
+    for i in range(len(modes_array)):
+        if used[i]:
+            continue
+
+        # Find all modes within bandwidth
+        distances = np.sqrt(np.sum((modes_array - modes_array[i]) ** 2, axis=1))
+        nearby = distances < bandwidth
+
+        # Average nearby modes
+        merged_mode = modes_array[nearby].mean(axis=0)
+        merged_modes.append(merged_mode)
+        used[nearby] = True
+
+    centers = np.array(merged_modes)
+
+    # Limit to max_clusters by keeping largest clusters
+    if len(centers) > max_clusters:
+        # Assign pixels to get cluster sizes
+        distances = np.array([np.sqrt(np.sum((pixels - c) ** 2, axis=1)) for c in centers])
+        temp_labels = np.argmin(distances, axis=0)
+
+        # Count pixels per cluster
+        cluster_sizes = np.array([np.sum(temp_labels == k) for k in range(len(centers))])
+
+        # Keep top max_clusters
+        top_indices = np.argsort(cluster_sizes)[-max_clusters:]
+        centers = centers[top_indices]
+
+    # Assign all pixels to nearest center
+    distances = np.array([np.sqrt(np.sum((pixels - c) ** 2, axis=1)) for c in centers])
+    labels = np.argmin(distances, axis=0)
+
+    logger.info("Mean Shift found %d clusters (bandwidth=%s)", len(centers), bandwidth)
+    record_clustering_run(
+        "mean_shift",
+        n_samples,
+        len(centers),
+        total_iterations,
+        max_iterations * n_seeds,
+        unconverged_seeds == 0,
+        max_final_shift,
+    )
+
+    return centers, labels
+
+
+# Estimated working memory per pixel in a chunk, excluding the distance matrix:
+# uint8 band copy, Oklab conversion temporaries, chroma weights and labels
+CHUNK_BYTES_PER_PIXEL = 320
+# Distance matrix and matmul temporaries cost this much per pixel per cluster
+CHUNK_BYTES_PER_PIXEL_PER_CLUSTER = 16
+
+
+def chunk_size_for_budget(memory_budget_bytes: int, n_clusters: int) -> int:
+    """Return how many pixels one chunk may hold within the memory budget."""
+    per_pixel = CHUNK_BYTES_PER_PIXEL + CHUNK_BYTES_PER_PIXEL_PER_CLUSTER * n_clusters
+    return max(1024, memory_budget_bytes // per_pixel)
+
+
+def iter_oklab_chunks(image: Image.Image, chunk_size: int) -> Iterator[NDArray[np.float64]]:
+    """Yield the opaque pixels of a full-resolution image in Oklab, one row band at a time.
+
+    Each band is cropped and converted on its own, so no full-size float copy of
+    the image is ever allocated.
+    """
+    rows_per_chunk = max(1, chunk_size // image.width)
+    for top in range(0, image.height, rows_per_chunk):
+        band = image.crop((0, top, image.width, min(top + rows_per_chunk, image.height)))
+        if band.mode not in ("RGB", "RGBA"):
+            band = band.convert("RGB")
+        band_array = np.asarray(band)
+        flat = band_array.reshape(-1, band_array.shape[-1])
+        if flat.shape[1] == 4:
+            flat = flat[flat[:, 3] >= ALPHA_THRESHOLD]
+        if len(flat):
+            yield rgb8_to_oklab(flat[:, :3])
+
+
+def assign_and_accumulate(
+    pixels: NDArray[np.float64],
+    weights: NDArray[np.float64],
+    centers: NDArray[np.float64],
+) -> tuple[NDArray[np.intp], NDArray[np.float64], NDArray[np.float64], NDArray[np.float64]]:
+    """Assign weighted pixels to their nearest center and sum them per cluster.
+
+    Returns:
+        Tuple of (labels, weighted coordinate sums (k, 3), weight sums (k,),
+        pixel counts (k,))
+    """
+    n_clusters = len(centers)
+
+    # |x - c|² = |x|² - 2x·c + |c|²; |x|² is constant per pixel, so argmin skips it
+    distances = np.sum(centers**2, axis=1) - 2.0 * (pixels @ centers.T)
+    labels = np.argmin(distances, axis=1)
+
+    counts = np.bincount(labels, minlength=n_clusters).astype(np.float64)
+    weight_sums = np.bincount(labels, weights=weights, minlength=n_clusters)
+    weighted_sums = np.column_stack(
+        [
+            np.bincount(labels, weights=weights * pixels[:, axis], minlength=n_clusters)
+            for axis in range(3)
+        ]
+    )
+    return labels, weighted_sums.astype(np.float64), weight_sums.astype(np.float64), counts
+
+
+def accumulate_cluster_stats(
+    pixels: NDArray[np.float64],
+    centers: NDArray[np.float64],
+    chroma_weight: float,
+) -> tuple[NDArray[np.float64], NDArray[np.float64], NDArray[np.float64]]:
+    """Assign pixels to their nearest center and sum them per cluster.
+
+    Returns:
+        Tuple of (chroma-weighted coordinate sums (k, 3), weight sums (k,),
+        pixel counts (k,)). Summing these over chunks gives the same k-means
+        update as processing all pixels at once.
+    """
+    _, weighted_sums, weight_sums, counts = assign_and_accumulate(
+        pixels, chroma_weights(pixels, chroma_weight), centers
+    )
+    return weighted_sums, weight_sums, counts
+
+
+def kmeans_chunked(
+    chunks: Callable[[], Iterable[NDArray[np.float64]]],
+    initial_centers: NDArray[np.float64],
+    max_iterations: int = 20,
+    tolerance: float = 1e-4,
+    chroma_weight: float = 10,
+) -> tuple[NDArray[np.float64], NDArray[np.float64], NDArray[np.float64]]:
+    """Chroma-weighted k-means that streams pixels instead of holding them in memory.
+
+    Args:
+        chunks: Callable returning a fresh iterable of Oklab pixel chunks per pass
+        initial_centers: Starting centers, e.g. from k-means on a downsampled image
+        max_iterations: Maximum passes over the pixel stream
+        tolerance: Stop once no center moves farther than this (Oklab distance)
+        chroma_weight: Weight factor for saturated colors
+
+    Returns:
+        Tuple of (centers, pixel count per cluster, chroma-weighted mass per cluster)
+    """
+    centers = initial_centers.copy()
+    n_clusters = len(centers)
+    counts = np.zeros(n_clusters)
+    masses = np.zeros(n_clusters)
+
+    iterations = 0
+    shift = 0.0
+    for _ in range(max_iterations):
+        iterations += 1
+        sums = np.zeros((n_clusters, 3))
+        counts = np.zeros(n_clusters)
+        masses = np.zeros(n_clusters)
+        for chunk in chunks():
+            chunk_sums, chunk_masses, chunk_counts = accumulate_cluster_stats(
+                chunk, centers, chroma_weight
+            )
+            sums += chunk_sums
+            masses += chunk_masses
+            counts += chunk_counts
+
+        # Empty clusters keep their previous center
+        occupied = masses > 0
+        new_centers = centers.copy()
+        new_centers[occupied] = sums[occupied] / masses[occupied, np.newaxis]
+
+        shift = float(np.max(np.sqrt(np.sum((new_centers - centers) ** 2, axis=1))))
+        centers = new_centers
+        if shift < tolerance:
+            break
+
+    record_clustering_run(
+        "kmeans_chunked",
+        int(counts.sum()),
+        n_clusters,
+        iterations,
+        max_iterations,
+        shift < tolerance,
+        shift,
+    )
+
+    return centers, counts, masses
+
+
+def image_to_oklab(
+    image: Image.Image,
+    sampling: SamplingStrategy = "box",
+    target_samples: int = DEFAULT_TARGET_SAMPLES,
+) -> NDArray[np.float64]:
+    """Sample an image's opaque pixels and convert them to Oklab.
+
+    Returns an (N, 3) array, empty when every pixel is transparent.
+    """
+    pixels_rgb = sample_pixels(image, sampling, target_samples)
+
+    # Convert to Oklab for perceptually uniform clustering
+    return rgb_to_oklab(pixels_rgb)
+
+
+def oklab_to_hex(oklab: NDArray[np.float64]) -> str:
+    """Convert a single Oklab color to a hex code."""
+    return oklab_to_hex_list(oklab.reshape(1, 3))[0]
+
+
+def oklab_to_hex_list(oklab: NDArray[np.float64]) -> list[str]:
+    """Convert (N, 3) Oklab colors to hex codes with one batched conversion."""
+    # Truncate like int() after clamping to the displayable range
+    rgb = np.clip(oklab_to_rgb(oklab), 0, 255).astype(np.uint8)
+    return [f"#{r:02x}{g:02x}{b:02x}" for r, g, b in rgb.tolist()]
+
+
+def pairwise_oklab_distances(centers_oklab: NDArray[np.float64]) -> NDArray[np.float64]:
+    """Return the (k, k) matrix of Euclidean distances between Oklab colors."""
+    diff = centers_oklab[:, np.newaxis] - centers_oklab[np.newaxis]
+    distances: NDArray[np.float64] = np.sqrt(np.sum(diff**2, axis=2))
+    return distances
+
+
+def normalize_percentages(colors: list[ExtractedColor]) -> None:
+    """Re-normalize percentages in place so the palette sums to 100."""
+    total_percentage = sum(color.percentage for color in colors)
+    if total_percentage > 0:
+        for color in colors:
+            color.percentage = round((color.percentage / total_percentage) * 100, 1)
+
+
+def cluster_pixels(
+    pixels_oklab: NDArray[np.float64],
+    n_clusters: int,
+    chroma_weight: float = 10,
+    init_centers: NDArray[np.float64] | None = None,
+) -> tuple[NDArray[np.float64], NDArray[np.float64], NDArray[np.float64]]:
+    """Cluster Oklab pixels with warm-started k-means.
+
+    Without ``init_centers``, a coarse pass over an evenly strided subset of at
+    most ``COARSE_SAMPLES`` pixels provides them, so the full-sample run starts
+    close to its solution and needs only a few refinement iterations.
+
+    Returns:
+        Tuple of (centers, pixel count per cluster, chroma-weighted mass per cluster)
+    """
+    if len(pixels_oklab) == 0:
+        return np.empty((0, 3)), np.empty(0), np.empty(0)
+
+    if init_centers is None and len(pixels_oklab) > 2 * COARSE_SAMPLES:
+        coarse = pixels_oklab[:: len(pixels_oklab) // COARSE_SAMPLES]
+        init_centers, _ = kmeans(coarse, n_clusters=n_clusters, chroma_weight=chroma_weight)
+
+    centers, labels = kmeans(
+        pixels_oklab, n_clusters=n_clusters, chroma_weight=chroma_weight, init_centers=init_centers
+    )
+    n_centers = len(centers)
+    sizes = np.bincount(labels, minlength=n_centers).astype(np.float64)
+    masses = np.bincount(
+        labels, weights=chroma_weights(pixels_oklab, chroma_weight), minlength=n_centers
+    ).astype(np.float64)
+    return centers, sizes, masses
+
+
+def extract_colors_from_image(
+    image: Image.Image,
+    num_colors: int,
+    sampling: SamplingStrategy = "box",
+    target_samples: int = DEFAULT_TARGET_SAMPLES,
+    similarity_threshold: float = 0.15,
+    selection: PaletteSelection = "size",
+) -> list[ExtractedColor]:
+    """Extract dominant colors from image using k-means++ in Oklab color space.
+
+    Uses oversampling (3x clusters) then selection that avoids similar colors.
+    """
+    pixels_oklab = image_to_oklab(image, sampling, target_samples)
+    return extract_colors_from_pixels(pixels_oklab, num_colors, similarity_threshold, selection)
+
+
+def extract_colors_from_pixels(
+    pixels_oklab: NDArray[np.float64],
+    num_colors: int,
+    similarity_threshold: float = 0.15,
+    selection: PaletteSelection = "size",
+) -> list[ExtractedColor]:
+    """Extract dominant colors from pixels already converted to Oklab."""
+    # Check if we have any pixels to process
+    if len(pixels_oklab) == 0:
+        return []
+
+    # Oversample: use 3x clusters to find more color variations
+    centers_oklab, sizes, _ = cluster_pixels(pixels_oklab, n_clusters=num_colors * 3)
+
+    return select_palette(centers_oklab, sizes, num_colors, similarity_threshold, selection)
+
+
+def select_palette(
+    centers_oklab: NDArray[np.float64],
+    sizes: NDArray[np.float64],
+    num_colors: int,
+    similarity_threshold: float = 0.15,
+    selection: PaletteSelection = "size",
+    diversity: float = 0.5,
+) -> list[ExtractedColor]:
+    """Pick palette colors from oversampled clusters.
+
+    Args:
+        centers_oklab: Cluster centers in Oklab space
+        sizes: Pixel count per cluster
+        num_colors: Maximum number of colors to return
+        similarity_threshold: Oklab distance under which colors count as duplicates
+        selection: "size" takes the largest clusters, skipping colors similar to
+            ones already picked. "diverse" uses maximal marginal relevance: each
+            pick maximizes a blend of cluster size and distance to the picks so far
+        diversity: Weight of distinctness versus size for "diverse" (0-1)
+
+    Returns:
+        Colors ordered by cluster size, percentages re-normalized to sum to 100
+    """
+    if len(centers_oklab) == 0:
+        return []
+
+    total_pixels = sizes.sum()
+    percentages = sizes / total_pixels * 100 if total_pixels > 0 else np.zeros(len(sizes))
+    distances = pairwise_oklab_distances(centers_oklab)
+
+    if selection == "diverse":
+        picked = _select_diverse(sizes, distances, num_colors, similarity_threshold, diversity)
+    else:
+        picked = _select_largest(sizes, distances, num_colors, similarity_threshold)
+    picked.sort(key=lambda i: -sizes[i])
+
+    hexes = oklab_to_hex_list(centers_oklab[picked])
+    selected = [
+        ExtractedColor(hex=hex_code, percentage=float(percentages[i]))
+        for hex_code, i in zip(hexes, picked, strict=True)
+    ]
+
+    # Re-normalize percentages after filtering
+    normalize_percentages(selected)
+
+    return selected
+
+
+def _select_largest(
+    sizes: NDArray[np.float64],
+    distances: NDArray[np.float64],
+    num_colors: int,
+    similarity_threshold: float,
+) -> list[int]:
+    """Greedy pass over clusters by size, skipping near-duplicates of earlier picks."""
+    picked: list[int] = []
+    blocked = np.zeros(len(sizes), dtype=bool)
+    for i in np.argsort(-sizes, kind="stable").tolist():
+        if len(picked) >= num_colors:
+            break
+        if blocked[i]:
+            continue
+        picked.append(i)
+        blocked |= distances[i] < similarity_threshold
+    return picked
+
+
+def _select_diverse(
+    sizes: NDArray[np.float64],
+    distances: NDArray[np.float64],
+    num_colors: int,
+    similarity_threshold: float,
+    diversity: float,
+) -> list[int]:
+    """Maximal marginal relevance: trade normalized size against distance to picks.
+
+    Starts from the largest cluster. ``diversity=1`` reduces to farthest-point
+    selection, ``diversity=0`` to picking by size alone.
+    """
+    relevance = sizes / max(float(sizes.max()), 1e-12)
+    spread = max(float(distances.max()), 1e-12)
+    # Empty clusters are left out unless there are too few non-empty ones to
+    # fill the palette; with enough diversity their distance would otherwise
+    # outweigh having no pixels
+    empty = sizes <= 0
+    allow_empty = np.count_nonzero(~empty) < num_colors
+
+    first = int(np.argmax(sizes))
+    picked = [first]
+    # Distance from each cluster to its nearest pick so far
+    nearest = distances[first].copy()
+    while len(picked) < num_colors:
+        scores = (1 - diversity) * relevance + diversity * nearest / spread
+        # Picked clusters (distance 0) and near-duplicates are never eligible
+        scores[nearest < max(similarity_threshold, 1e-12)] = -np.inf
+        non_empty_scores = np.where(empty, -np.inf, scores)
+        if not allow_empty or np.isfinite(non_empty_scores.max()):
+            scores = non_empty_scores
+        candidate = int(np.argmax(scores))
+        if not np.isfinite(scores[candidate]):
+            break
+        picked.append(candidate)
+        np.minimum(nearest, distances[candidate], out=nearest)
+    return picked
+
+
+def build_palette_hierarchy(
+    centers_oklab: NDArray[np.float64],
+    sizes: NDArray[np.float64],
+    masses: NDArray[np.float64],
+    min_colors: int = 2,
+    max_colors: int = 10,
+    similarity_threshold: float = 0.15,
+) -> dict[int, list[ExtractedColor]]:
+    """Agglomerate oversampled clusters into a palette for every color count.
+
+    Clusters closer than ``similarity_threshold`` are merged first, mirroring the
+    greedy selection in ``extract_colors_from_image``. The remaining clusters are
+    merged by Ward cost on their chroma-weighted mass, so vivid clusters resist
+    being absorbed. A merged node keeps the color of its heavier child, so every
+    palette entry is an actual cluster center rather than a blend.
+
+    Args:
+        centers_oklab: Cluster centers in Oklab space
+        sizes: Pixel count per cluster
+        masses: Sum of chroma weights per cluster
+        min_colors: Smallest palette size to return
+        max_colors: Largest palette size to return
+        similarity_threshold: Oklab distance under which clusters count as duplicates
+
+    Returns:
+        Palettes keyed by color count. Images with fewer distinct colors than a
+        requested count get the largest palette available for that count.
+    """
+    keep = sizes > 0
+    reps = centers_oklab[keep].copy()
+    node_sizes = sizes[keep].astype(np.float64)
+    node_masses = masses[keep].astype(np.float64)
+    total = node_sizes.sum()
+
+    if len(reps) == 0:
+        return {k: [] for k in range(min_colors, max_colors + 1)}
+
+    def snapshot() -> list[ExtractedColor]:
+        order = np.argsort(-node_sizes, kind="stable")
+        colors = [
+            ExtractedColor(hex=hex_code, percentage=float(node_sizes[i] / total * 100))
+            for hex_code, i in zip(oklab_to_hex_list(reps[order]), order, strict=True)
+        ]
+        normalize_percentages(colors)
+        return colors
+
+    def merge(i: int, j: int) -> None:
+        nonlocal reps, node_sizes, node_masses
+        # Dominant (heavier chroma-weighted) child keeps its color
+        if node_masses[j] > node_masses[i]:
+            reps[i] = reps[j]
+        node_sizes[i] += node_sizes[j]
+        node_masses[i] += node_masses[j]
+        reps = np.delete(reps, j, axis=0)
+        node_sizes = np.delete(node_sizes, j)
+        node_masses = np.delete(node_masses, j)
+
+    def closest_pair(cost: NDArray[np.float64]) -> tuple[int, int]:
+        np.fill_diagonal(cost, np.inf)
+        i, j = np.unravel_index(np.argmin(cost), cost.shape)
+        return (int(i), int(j)) if i < j else (int(j), int(i))
+
+    # Phase 1: collapse clusters the greedy selection would treat as duplicates
+    while len(reps) > 1:
+        dist_sq = np.sum((reps[:, np.newaxis] - reps[np.newaxis]) ** 2, axis=2)
+        i, j = closest_pair(dist_sq)
+        if dist_sq[i, j] >= similarity_threshold**2:
+            break
+        merge(i, j)
+
+    # Phase 2: Ward merges on chroma-weighted mass, recording each palette size
+    palettes: dict[int, list[ExtractedColor]] = {}
+    while True:
+        if len(reps) <= max_colors:
+            palettes[len(reps)] = snapshot()
+        if len(reps) <= min_colors:
+            break
+        dist_sq = np.sum((reps[:, np.newaxis] - reps[np.newaxis]) ** 2, axis=2)
+        mass_product = node_masses[:, np.newaxis] * node_masses[np.newaxis]
+        mass_sum = node_masses[:, np.newaxis] + node_masses[np.newaxis]
+        merge(*closest_pair(mass_product / mass_sum * dist_sq))
+
+    # Counts above the number of distinct colors reuse the largest palette
+    largest = max(palettes)
+    return {
+        k: palettes[k] if k in palettes else palettes[largest]
+        for k in range(min_colors, max_colors + 1)
+    }
+
+
+def extract_palette_hierarchy(
+    image: Image.Image,
+    min_colors: int = 2,
+    max_colors: int = 10,
+    sampling: SamplingStrategy = "box",
+    target_samples: int = DEFAULT_TARGET_SAMPLES,
+    similarity_threshold: float = 0.15,
+    chroma_weight: float = 10,
+) -> dict[int, list[ExtractedColor]]:
+    """Extract palettes for every color count from a single clustering pass.
+
+    Runs k-means once with 3x the largest color count, then answers every count
+    from the merge tree built by ``build_palette_hierarchy``.
+    """
+    pixels_oklab = image_to_oklab(image, sampling, target_samples)
+    return extract_palette_hierarchy_from_pixels(
+        pixels_oklab,
+        min_colors=min_colors,
+        max_colors=max_colors,
+        similarity_threshold=similarity_threshold,
+        chroma_weight=chroma_weight,
+    )
+
+
+def extract_palette_hierarchy_from_pixels(
+    pixels_oklab: NDArray[np.float64],
+    min_colors: int = 2,
+    max_colors: int = 10,
+    similarity_threshold: float = 0.15,
+    chroma_weight: float = 10,
+) -> dict[int, list[ExtractedColor]]:
+    """Extract palettes for every color count from pixels already converted to Oklab."""
+    if len(pixels_oklab) == 0:
+        return {k: [] for k in range(min_colors, max_colors + 1)}
+
+    centers_oklab, sizes, masses = cluster_pixels(
+        pixels_oklab, n_clusters=max_colors * 3, chroma_weight=chroma_weight
+    )
+
+    return build_palette_hierarchy(
+        centers_oklab,
+        sizes,
+        masses,
+        min_colors=min_colors,
+        max_colors=max_colors,
+        similarity_threshold=similarity_threshold,
+    )
+
+
+def cluster_full_resolution(
+    image: Image.Image,
+    n_clusters: int,
+    memory_budget_bytes: int,
+    chroma_weight: float = 10,
+) -> tuple[NDArray[np.float64], NDArray[np.float64], NDArray[np.float64]]:
+    """Cluster every pixel of an image within a fixed working-memory budget.
+
+    Seeds centers with k-means on a box-sampled copy, then refines them with
+    chunked passes over the full-resolution pixels. Working memory is bounded by
+    ``memory_budget_bytes`` on top of the decoded image itself.
+
+    Returns:
+        Tuple of (centers, pixel count per cluster, chroma-weighted mass per cluster)
+    """
+    # Decode at full size before seeding: a JPEG not yet loaded could otherwise
+    # be drafted to a fraction of its pixels, and the chunked passes must see
+    # every pixel
+    image.load()
+    seed_pixels = image_to_oklab(image, "box")
+    if len(seed_pixels) == 0:
+        return np.empty((0, 3)), np.empty(0), np.empty(0)
+
+    initial_centers, _, _ = cluster_pixels(
+        seed_pixels, n_clusters=n_clusters, chroma_weight=chroma_weight
+    )
+    chunk_size = chunk_size_for_budget(memory_budget_bytes, n_clusters)
+    logger.debug("Full-resolution clustering with %d-pixel chunks", chunk_size)
+
+    return kmeans_chunked(
+        lambda: iter_oklab_chunks(image, chunk_size),
+        initial_centers,
+        chroma_weight=chroma_weight,
+    )
+
+
+def extract_colors_full_resolution(
+    image: Image.Image,
+    num_colors: int,
+    memory_budget_bytes: int,
+    similarity_threshold: float = 0.15,
+    selection: PaletteSelection = "size",
+) -> list[ExtractedColor]:
+    """Extract dominant colors from every pixel of an image within a memory budget."""
+    centers_oklab, sizes, _ = cluster_full_resolution(
+        image, num_colors * 3, memory_budget_bytes
+    )
+    return select_palette(centers_oklab, sizes, num_colors, similarity_threshold, selection)
+
+
+def extract_palette_hierarchy_full_resolution(
+    image: Image.Image,
+    memory_budget_bytes: int,
+    min_colors: int = 2,
+    max_colors: int = 10,
+    similarity_threshold: float = 0.15,
+) -> dict[int, list[ExtractedColor]]:
+    """Extract palettes for every color count from every pixel within a memory budget."""
+    centers_oklab, sizes, masses = cluster_full_resolution(
+        image, max_colors * 3, memory_budget_bytes
+    )
+    return build_palette_hierarchy(
+        centers_oklab,
+        sizes,
+        masses,
+        min_colors=min_colors,
+        max_colors=max_colors,
+        similarity_threshold=similarity_threshold,
+    )
@@ -0,0 +1,251 @@
+"""Nearest-named-color lookup against Tailwind and custom design-token sets.
+
+Each token set is indexed once on a uniform grid over the Oklab bounding box of
+the sRGB gamut. Every grid cell stores the tokens that can be nearest to some
+point inside it, so a query only compares against its cell's short candidate
+list and the result is still the exact nearest token. Lookups for many colors
+run as a few vectorized gathers rather than a loop per color.
+"""
+
+import json
+import re
+from collections.abc import Iterator, Sequence
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from numpy.typing import NDArray
+
+from app.core.config import get_settings
+from app.core.logging import get_logger
+from app.schemas.colors import ExtractedColor, NearestColor, NearestColorMatch
+from app.utils.color_conversion import rgb8_to_oklab
+from app.utils.tailwind_colors import TAILWIND_COLORS, TAILWIND_SHADES
+
+logger = get_logger(__name__)
+
+# Cells per axis of the lookup grid
+GRID_RESOLUTION = 24
+
+# Oklab bounding box of the sRGB gamut, rounded outward
+OKLAB_MIN = np.array([0.0, -0.24, -0.32])
+OKLAB_MAX = np.array([1.0, 0.28, 0.20])
+
+HEX_PATTERN = re.compile(r'^#?([0-9a-fA-F]{3}|[0-9a-fA-F]{6})$')
+
+
+def normalize_hex(value: str) -> str:
+    """Return a color as lowercase ``#rrggbb``, expanding ``#rgb`` shorthand."""
+    match = HEX_PATTERN.match(value.strip())
+    if match is None:
+        raise ValueError(f'Not a hex color: {value!r}')
+    digits = match.group(1).lower()
+    if len(digits) == 3:
+        digits = ''.join(digit * 2 for digit in digits)
+    return f'#{digits}'
+
+
+def hex_to_rgb8(hex_codes: Sequence[str]) -> NDArray[np.uint8]:
+    """Parse ``#rrggbb`` codes into an (N, 3) uint8 array in one pass."""
+    joined = ''.join(code.lstrip('#') for code in hex_codes)
+    return np.frombuffer(bytes.fromhex(joined), dtype=np.uint8).reshape(-1, 3)
+
+
+class ColorTokenIndex:
+    """
+    Exact nearest-token index over a uniform Oklab grid.
+
+    For a cell with center ``c`` and half-diagonal ``r`` whose closest token to
+    ``c`` is at distance ``d``, the nearest token to any point in the cell lies
+    within ``d + 2r`` of ``c``. Those tokens form the cell's candidate list.
+    """
+
+    def __init__(self, tokens: dict[str, str], resolution: int = GRID_RESOLUTION) -> None:
+        """
+        Build the index.
+
+        Args:
+            tokens: Token name to hex color
+            resolution: Grid cells per Oklab axis
+
+        Raises:
+            ValueError: If the token set is empty or contains an invalid color
+        """
+        if not tokens:
+            raise ValueError('Token set is empty')
+
+        self.names = list(tokens)
+        self.hex_codes = [normalize_hex(code) for code in tokens.values()]
+        self.oklab = rgb8_to_oklab(hex_to_rgb8(self.hex_codes))
+        self.resolution = resolution
+        self._cell_size = (OKLAB_MAX - OKLAB_MIN) / resolution
+
+        axes = [
+            OKLAB_MIN[axis] + (np.arange(resolution) + 0.5) * self._cell_size[axis]
+            for axis in range(3)
+        ]
+        cell_centers = np.stack(np.meshgrid(*axes, indexing='ij'), axis=-1).reshape(-1, 3)
+        half_diagonal = float(np.linalg.norm(self._cell_size)) / 2
+
+        distances = np.sqrt(
+            np.maximum(
+                np.sum(cell_centers**2, axis=1)[:, np.newaxis]
+                - 2.0 * (cell_centers @ self.oklab.T)
+                + np.sum(self.oklab**2, axis=1),
+                0.0,
+            )
+        )
+        reach = distances.min(axis=1, keepdims=True) + 2 * half_diagonal
+        # Small slack absorbs rounding in the expanded distance formula
+        eligible = distances <= reach + 1e-9
+
+        # Eligible tokens first; shorter lists are padded with their first candidate
+        counts = eligible.sum(axis=1)
+        width = int(counts.max())
+        candidates = np.argsort(~eligible, axis=1, kind='stable')[:, :width]
+        padding = np.arange(width) >= counts[:, np.newaxis]
+        candidates[padding] = np.broadcast_to(candidates[:, :1], candidates.shape)[padding]
+        self._candidates = candidates.astype(np.intp)
+        self._counts = counts
+
+    @property
+    def max_candidates(self) -> int:
+        """Longest candidate list of any cell."""
+        return int(self._candidates.shape[1])
+
+    def query(
+        self, oklab: NDArray[np.float64]
+    ) -> tuple[NDArray[np.intp], NDArray[np.float64]]:
+        """
+        Find the nearest token for each Oklab color.
+
+        Colors must lie inside the sRGB gamut's bounding box (any color parsed
+        from hex does); others are clamped to the edge cells.
+
+        Returns:
+            Tuple of (token indices (N,), Oklab distances (N,))
+        """
+        cells = np.floor((oklab - OKLAB_MIN) / self._cell_size).astype(np.intp)
+        np.clip(cells, 0, self.resolution - 1, out=cells)
+        flat = (cells[:, 0] * self.resolution + cells[:, 1]) * self.resolution + cells[:, 2]
+
+        # Candidate lists vary a lot in length (cells far from every token have
+        # long ones), so queries are grouped into tiers of doubling list width
+        counts = self._counts[flat]
+        indices = np.empty(len(oklab), dtype=np.intp)
+        distances = np.empty(len(oklab))
+        width = 0
+        while width < self.max_candidates:
+            lower, width = width, min(max(2 * width, 8), self.max_candidates)
+            tier = np.flatnonzero((counts > lower) & (counts <= width))
+            if len(tier) == 0:
+                continue
+            candidates = self._candidates[flat[tier], :width]
+            dist_sq = np.sum((self.oklab[candidates] - oklab[tier, np.newaxis]) ** 2, axis=2)
+            best = np.argmin(dist_sq, axis=1)
+            rows = np.arange(len(tier))
+            indices[tier] = candidates[rows, best]
+            distances[tier] = np.sqrt(dist_sq[rows, best])
+        return indices, distances
+
+    def nearest(self, hex_codes: Sequence[str]) -> list[NearestColor]:
+        """Return the nearest token for each ``#rrggbb`` color."""
+        if not hex_codes:
+            return []
+        indices, distances = self.query(rgb8_to_oklab(hex_to_rgb8(hex_codes)))
+        return [
+            NearestColor(token=self.names[i], hex=self.hex_codes[i], delta_e=round(d, 4))
+            for i, d in zip(indices.tolist(), distances.tolist(), strict=True)
+        ]
+
+
+def match_colors(index: ColorTokenIndex, colors: Sequence[str]) -> list[NearestColorMatch]:
+    """Match requested colors (``#rgb``/``rrggbb`` forms allowed) to their nearest tokens."""
+    normalized = [normalize_hex(color) for color in colors]
+    return [
+        NearestColorMatch(color=color, token=match.token, hex=match.hex, delta_e=match.delta_e)
+        for color, match in zip(normalized, index.nearest(normalized), strict=True)
+    ]
+
+
+def attach_nearest(colors: list[ExtractedColor], index: ColorTokenIndex) -> list[ExtractedColor]:
+    """Return copies of extracted colors annotated with their nearest token."""
+    matches = index.nearest([color.hex for color in colors])
+    return [
+        color.model_copy(update={'nearest': match})
+        for color, match in zip(colors, matches, strict=True)
+    ]
+
+
+def tailwind_tokens() -> dict[str, str]:
+    """Return the Tailwind palette as ``{'blue-600': '#2563eb', ...}``."""
+    return {
+        f'{name}-{shade}': code
+        for name, scale in TAILWIND_COLORS.items()
+        for shade, code in zip(TAILWIND_SHADES, scale, strict=True)
+    }
+
+
+def _flatten_tokens(node: Any, prefix: str) -> Iterator[tuple[str, str]]:
+    """Yield (name, hex) pairs from nested token groups, skipping non-color values."""
+    if isinstance(node, dict):
+        # W3C design tokens keep the value under "$value"
+        if '$value' in node:
+            yield from _flatten_tokens(node['$value'], prefix)
+            return
+        for key, child in node.items():
+            if not key.startswith('$'):
+                yield from _flatten_tokens(child, f'{prefix}-{key}' if prefix else str(key))
+    elif isinstance(node, str) and HEX_PATTERN.match(node.strip()):
+        yield prefix, normalize_hex(node)
+
+
+def load_token_file(path: str | Path) -> dict[str, str]:
+    """
+    Load a design-token set from JSON.
+
+    Accepts flat (``{"brand-primary": "#0055ff"}``), nested
+    (``{"brand": {"primary": "#0055ff"}}``) and W3C design-token
+    (``{"brand": {"primary": {"$value": "#0055ff"}}}``) layouts. Nested names
+    are joined with ``-``; values that aren't hex colors are ignored.
+    """
+    with open(path, encoding='utf-8') as file:
+        data = json.load(file)
+    return dict(_flatten_tokens(data, ''))
+
+
+@lru_cache
+def get_token_indexes() -> dict[str, ColorTokenIndex]:
+    """
+    Build the indexes for the built-in Tailwind set and configured token files.
+
+    Each file is loaded on its own: one that is missing, isn't valid JSON or
+    holds no colors is logged and skipped, so the other sets stay available.
+    """
+    indexes = {'tailwind': ColorTokenIndex(tailwind_tokens())}
+    for path in get_settings().color_token_files_list:
+        name = Path(path).stem
+        try:
+            indexes[name] = ColorTokenIndex(load_token_file(path))
+        except (OSError, ValueError) as e:
+            logger.error('Skipping token set %s from %s: %s', name, path, e)
+
+    for name, index in indexes.items():
+        logger.info(
+            'Indexed token set %s: %d colors, up to %d candidates per cell',
+            name,
+            len(index.names),
+            index.max_candidates,
+        )
+    return indexes
+
+
+def get_token_index(name: str) -> ColorTokenIndex:
+    """
+    Return the index for a token set.
+
+    Raises:
+        KeyError: If no token set has that name
+    """
+    return get_token_indexes()[name]
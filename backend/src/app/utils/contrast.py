@@ -0,0 +1,180 @@
+"""Bulk WCAG 2.x and APCA contrast between colors.
+
+Both metrics are computed for every pair at once by broadcasting per-color
+luminances into an (N, M) matrix. Large sets are filtered by threshold in row
+blocks, so memory stays bounded no matter how many pairs there are.
+"""
+
+from collections.abc import Sequence
+
+import numpy as np
+from numpy.typing import NDArray
+
+from app.schemas.colors import ContrastMatrix, ContrastMetric, ContrastPair
+from app.utils.color_conversion import srgb_to_linear
+from app.utils.color_tokens import hex_to_rgb8
+
+# WCAG 2.x relative luminance weights for linear sRGB
+WCAG_LUMINANCE = np.array([0.2126, 0.7152, 0.0722])
+
+# APCA-W3 0.0.98G-4g constants
+APCA_EXPONENT = 2.4
+APCA_LUMINANCE = np.array([0.2126729, 0.7151522, 0.0721750])
+APCA_BLACK_THRESHOLD = 0.022
+APCA_BLACK_CLAMP = 1.414
+APCA_NORMAL_BG, APCA_NORMAL_TEXT = 0.56, 0.57
+APCA_REVERSE_BG, APCA_REVERSE_TEXT = 0.65, 0.62
+APCA_SCALE = 1.14
+APCA_OFFSET = 0.027
+APCA_LOW_CLIP = 0.1
+
+# Matrix elements computed at once when filtering pairs (a few MB per temporary)
+PAIR_BLOCK_ELEMENTS = 1 << 20
+
+
+def relative_luminance(rgb8: NDArray[np.uint8]) -> NDArray[np.float64]:
+    """WCAG 2.x relative luminance of (N, 3) 8-bit sRGB colors."""
+    result: NDArray[np.float64] = srgb_to_linear(rgb8 / 255.0) @ WCAG_LUMINANCE
+    return result
+
+
+def wcag_contrast(
+    luminance_a: NDArray[np.float64], luminance_b: NDArray[np.float64]
+) -> NDArray[np.float64]:
+    """(N, M) WCAG contrast ratios, ``(lighter + 0.05) / (darker + 0.05)``."""
+    lighter = np.maximum.outer(luminance_a, luminance_b)
+    darker = np.minimum.outer(luminance_a, luminance_b)
+    result: NDArray[np.float64] = (lighter + 0.05) / (darker + 0.05)
+    return result
+
+
+def apca_luminance(rgb8: NDArray[np.uint8]) -> NDArray[np.float64]:
+    """
+    APCA screen luminance of (N, 3) 8-bit sRGB colors.
+
+    APCA deliberately uses a plain 2.4 power curve rather than the piecewise
+    sRGB transfer function, and soft-clamps near-black levels.
+    """
+    y = ((rgb8 / 255.0) ** APCA_EXPONENT) @ APCA_LUMINANCE
+    dark = y < APCA_BLACK_THRESHOLD
+    y[dark] += (APCA_BLACK_THRESHOLD - y[dark]) ** APCA_BLACK_CLAMP
+    result: NDArray[np.float64] = y
+    return result
+
+
+def apca_contrast(
+    text_y: NDArray[np.float64], background_y: NDArray[np.float64]
+) -> NDArray[np.float64]:
+    """
+    (N, M) APCA lightness contrast of each text color on each background.
+
+    Positive Lc is dark text on a light background, negative the reverse.
+    """
+    # Powers are taken per color before broadcasting: background^x - text^y
+    sapc = np.add.outer(-(text_y**APCA_REVERSE_TEXT), background_y**APCA_REVERSE_BG)
+    np.copyto(
+        sapc,
+        np.add.outer(-(text_y**APCA_NORMAL_TEXT), background_y**APCA_NORMAL_BG),
+        where=np.less.outer(text_y, background_y),
+    )
+    sapc *= APCA_SCALE
+
+    # Normal polarity always gives a positive SAPC and reverse a negative one,
+    # so the low clip and offset only need its magnitude and sign. Near-equal
+    # luminances stay far under the clip, which covers APCA's minimum-delta check.
+    clipped = np.abs(sapc) < APCA_LOW_CLIP
+    sapc -= np.copysign(APCA_OFFSET, sapc)
+    sapc[clipped] = 0.0
+    sapc *= 100
+    return sapc
+
+
+def _metric_inputs(hex_codes: Sequence[str], metric: ContrastMetric) -> NDArray[np.float64]:
+    rgb8 = hex_to_rgb8(hex_codes)
+    return relative_luminance(rgb8) if metric == 'wcag' else apca_luminance(rgb8)
+
+
+def _metric_matrix(
+    rows: NDArray[np.float64], columns: NDArray[np.float64], metric: ContrastMetric
+) -> NDArray[np.float64]:
+    return wcag_contrast(rows, columns) if metric == 'wcag' else apca_contrast(rows, columns)
+
+
+def _round(matrix: NDArray[np.float64], metric: ContrastMetric) -> list[list[float]]:
+    # Ratios are quoted to two decimals (4.5:1), Lc to one
+    result: list[list[float]] = matrix.round(2 if metric == 'wcag' else 1).tolist()
+    return result
+
+
+def contrast_matrix(hex_codes: Sequence[str], metric: ContrastMetric) -> list[list[float]]:
+    """Full contrast matrix for ``#rrggbb`` colors: row color on column color."""
+    values = _metric_inputs(hex_codes, metric)
+    return _round(_metric_matrix(values, values, metric), metric)
+
+
+def palette_contrast(hex_codes: Sequence[str]) -> ContrastMatrix:
+    """Both contrast matrices for a palette."""
+    return ContrastMatrix(
+        wcag=contrast_matrix(hex_codes, 'wcag'), apca=contrast_matrix(hex_codes, 'apca')
+    )
+
+
+def contrast_pairs(
+    hex_codes: Sequence[str], metric: ContrastMetric, min_contrast: float, limit: int
+) -> tuple[list[ContrastPair], int]:
+    """
+    Find the color pairs whose contrast reaches a threshold.
+
+    WCAG is symmetric, so each unordered pair is reported once (in request
+    order); APCA depends on polarity, so both orders are considered.
+
+    Args:
+        hex_codes: ``#rrggbb`` colors
+        metric: Contrast metric
+        min_contrast: Minimum WCAG ratio, or minimum absolute APCA Lc
+        limit: Maximum number of pairs returned
+
+    Returns:
+        Tuple of (up to ``limit`` pairs with the highest contrast first,
+        total number of pairs reaching the threshold)
+    """
+    values = _metric_inputs(hex_codes, metric)
+    n = len(values)
+    block_rows = max(1, PAIR_BLOCK_ELEMENTS // n)
+
+    # Running top-``limit`` pairs, merged block by block
+    best_rows = np.empty(0, dtype=np.intp)
+    best_columns = np.empty(0, dtype=np.intp)
+    best_values = np.empty(0)
+    total = 0
+    for start in range(0, n, block_rows):
+        block = _metric_matrix(values[start : start + block_rows], values, metric)
+        rows, columns = np.nonzero(np.abs(block) >= min_contrast)
+        block_values = block[rows, columns]
+        rows = rows + start
+        keep = rows < columns if metric == 'wcag' else rows != columns
+        rows, columns, block_values = rows[keep], columns[keep], block_values[keep]
+        total += len(rows)
+
+        best_rows = np.concatenate([best_rows, rows])
+        best_columns = np.concatenate([best_columns, columns])
+        best_values = np.concatenate([best_values, block_values])
+        if len(best_values) > limit:
+            top = np.argpartition(-np.abs(best_values), limit - 1)[:limit]
+            best_rows, best_columns = best_rows[top], best_columns[top]
+            best_values = best_values[top]
+
+    order = np.argsort(-np.abs(best_values), kind='stable')
+    decimals = 2 if metric == 'wcag' else 1
+    pairs = [
+        ContrastPair(
+            foreground=hex_codes[row], background=hex_codes[column], contrast=round(value, decimals)
+        )
+        for row, column, value in zip(
+            best_rows[order].tolist(),
+            best_columns[order].tolist(),
+            best_values[order].tolist(),
+            strict=True,
+        )
+    ]
+    return pairs, total
@@ -0,0 +1,597 @@
+"""Streaming SVG optimizer.
+
+Documents are parsed incrementally with expat and re-serialized as they are
+read: each ``feed`` returns the output for that chunk, and the optimizer only
+keeps one frame per open element, so memory follows nesting depth rather than
+document size. Passes (reported separately):
+
+- ``remove_comments``: comments, processing instructions, XML declaration, DOCTYPE
+- ``remove_metadata``: ``<metadata>`` plus elements, attributes and namespace
+  declarations from editor namespaces (Inkscape, Sodipodi, Illustrator, Sketch, ...)
+- ``round_numbers``: path data, point lists, transforms and lengths rounded to
+  ``precision`` decimals and written in their shortest form
+- ``collapse_groups``: attribute-less ``<g>`` wrappers unwrapped, empty groups
+  and ``<defs>`` dropped
+- ``minify_attributes``: whitespace collapsed, hex colors shortened, empty
+  attributes dropped
+- ``remove_whitespace``: whitespace-only text outside text content elements
+
+Start tags are held back until the element's first child or text arrives, so
+empty elements can be self-closed (or dropped) without buffering their content.
+"""
+
+import math
+import re
+import time
+from dataclasses import dataclass
+from xml.parsers import expat
+
+from app.schemas.svg import DEFAULT_SVG_PRECISION, SvgOptimizeReport, SvgPassReport
+
+PASSES = (
+    'remove_comments',
+    'remove_metadata',
+    'round_numbers',
+    'collapse_groups',
+    'minify_attributes',
+    'remove_whitespace',
+)
+
+# Namespaces written by editors and exporters that renderers ignore
+EDITOR_NAMESPACES = frozenset({
+    'http://creativecommons.org/ns#',
+    'http://inkscape.sourceforge.net/DTD/sodipodi-0.dtd',
+    'http://ns.adobe.com/AdobeIllustrator/10.0/',
+    'http://ns.adobe.com/AdobeSVGViewerExtensions/3.0/',
+    'http://ns.adobe.com/Extensibility/1.0/',
+    'http://ns.adobe.com/Flows/1.0/',
+    'http://ns.adobe.com/GenericCustomNamespace/1.0/',
+    'http://ns.adobe.com/Graphs/1.0/',
+    'http://ns.adobe.com/ImageReplacement/1.0/',
+    'http://ns.adobe.com/SaveForWeb/1.0/',
+    'http://ns.adobe.com/Variables/1.0/',
+    'http://ns.adobe.com/XPath/1.0/',
+    'http://purl.org/dc/elements/1.1/',
+    'http://schemas.microsoft.com/visio/2003/SVGExtensions/',
+    'http://sodipodi.sourceforge.net/DTD/sodipodi-0.dtd',
+    'http://taptrix.com/vectorillustrator/svg_extensions',
+    'http://www.bohemiancoding.com/sketch/ns',
+    'http://www.figma.com/figma/ns',
+    'http://www.inkscape.org/namespaces/inkscape',
+    'http://www.serif.com/',
+    'http://www.vector.evaxdesign.sk',
+    'http://www.w3.org/1999/02/22-rdf-syntax-ns#',
+})
+
+# Elements whose character data is rendered or parsed, kept verbatim with their descendants'
+TEXT_ELEMENTS = frozenset({'text', 'tspan', 'textPath', 'title', 'desc', 'style', 'script'})
+
+# Containers that render nothing when empty
+REMOVABLE_EMPTY_ELEMENTS = frozenset({'g', 'defs'})
+
+# Attributes holding numbers, number lists or transforms (``d`` is handled separately)
+NUMERIC_ATTRIBUTES = frozenset({
+    'x', 'y', 'x1', 'y1', 'x2', 'y2', 'cx', 'cy', 'r', 'rx', 'ry', 'fx', 'fy', 'dx', 'dy',
+    'width', 'height', 'viewBox', 'points', 'transform', 'gradientTransform',
+    'patternTransform', 'offset', 'opacity', 'fill-opacity', 'stroke-opacity',
+    'stop-opacity', 'stroke-width', 'stroke-dasharray', 'stroke-dashoffset',
+    'stroke-miterlimit', 'font-size', 'stdDeviation', 'refX', 'refY', 'markerWidth',
+    'markerHeight',
+})  # fmt: skip
+
+# Numeric attributes in the 0-1 range, where coordinate precision would erase
+# the value (opacity=".5" at precision 0 hides the element); kept to at least
+# UNIT_INTERVAL_PRECISION decimals
+UNIT_INTERVAL_ATTRIBUTES = frozenset({
+    'offset', 'opacity', 'fill-opacity', 'stroke-opacity', 'stop-opacity',
+})  # fmt: skip
+UNIT_INTERVAL_PRECISION = 3
+
+COLOR_ATTRIBUTES = frozenset({
+    'fill', 'stroke', 'stop-color', 'flood-color', 'lighting-color', 'color',
+})  # fmt: skip
+
+# Expat limits entity amplification (billion laughs) from this version on;
+# older builds refuse entity declarations altogether
+ENTITY_SAFE_EXPAT = (2, 4, 0)
+
+# Empty values of these are meaningful (an empty condition is always false)
+CONDITIONAL_ATTRIBUTES = frozenset({'requiredExtensions', 'requiredFeatures', 'systemLanguage'})
+
+NUMBER = r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?'
+_NUMBER_RE = re.compile(NUMBER)
+_PATH_TOKEN_RE = re.compile(rf'[\s,]*([MmZzLlHhVvCcSsQqTtAa]|{NUMBER})')
+# Arc flags are single digits and may be written without separators ("a1 1 0 01 5 5")
+_ARC_FLAG_RE = re.compile(r'[\s,]*([01])')
+_LONG_HEX_RE = re.compile(r'#([0-9a-fA-F]{6}|[0-9a-fA-F]{3})')
+_WHITESPACE_RE = re.compile(r'\s+')
+_LIST_PUNCTUATION_RE = re.compile(r'\s*([(,])\s*|\s+(\))')
+_STYLE_PUNCTUATION_RE = re.compile(r'\s*([;:])\s*')
+
+
+def round_number(token: str, precision: int) -> str:
+    """Round a number and write it in its shortest form (``0.500`` -> ``.5``)."""
+    value = float(token)
+    if not math.isfinite(value):
+        return token
+    text = f'{value:.{precision}f}'
+    if '.' in text:
+        text = text.rstrip('0').rstrip('.')
+    if text in ('', '-0', '-'):
+        return '0'
+    if text.startswith('0.'):
+        return text[1:]
+    if text.startswith('-0.'):
+        return '-' + text[2:]
+    return text
+
+
+def _needs_separator(previous: str, following: str) -> bool:
+    """Whether two rounded numbers would run together without a separator."""
+    if following[0] == '-':
+        return False
+    return not (following[0] == '.' and '.' in previous)
+
+
+def _path_tokens(data: str) -> list[str] | None:
+    """Split path data into commands and numbers, or return None if it doesn't parse."""
+    if 'A' not in data and 'a' not in data:
+        # Without arcs every number is a plain coordinate, so one C-level scan
+        # does it, with a second pass confirming nothing but separators was skipped
+        if _PATH_TOKEN_RE.sub('', data).strip(' \t\r\n,'):
+            return None
+        return _PATH_TOKEN_RE.findall(data)
+
+    tokens: list[str] = []
+    command, index, position = '', 0, 0
+    while True:
+        arc_flag = command in ('A', 'a') and index % 7 in (3, 4)
+        match = (_ARC_FLAG_RE if arc_flag else _PATH_TOKEN_RE).match(data, position)
+        if match is None:
+            break
+        token, position = match.group(1), match.end()
+        if token.isalpha():
+            command, index = token, 0
+        else:
+            index += 1
+        # Flags are kept as written, so mark them to skip rounding
+        tokens.append(f'!{token}' if arc_flag else token)
+    return None if data[position:].strip(' \t\r\n,') else tokens
+
+
+def minify_path_data(data: str, precision: int) -> str:
+    """
+    Round path data and write it with the fewest separators.
+
+    Returns the data unchanged if it doesn't parse, so malformed paths render
+    exactly as before.
+    """
+    tokens = _path_tokens(data)
+    if tokens is None:
+        return data
+
+    parts: list[str] = []
+    previous = ''
+    for token in tokens:
+        if token.isalpha():
+            parts.append(token)
+            previous = ''
+            continue
+        number = token[1:] if token[0] == '!' else round_number(token, precision)
+        if previous and _needs_separator(previous, number):
+            parts.append(' ')
+        parts.append(number)
+        previous = number
+    return ''.join(parts)
+
+
+def minify_numbers(value: str, precision: int) -> str:
+    """Round every number in a list, length or transform (``translate(10.0, 20.25)``)."""
+    parts: list[str] = []
+    previous = ''
+    last = 0
+    for match in _NUMBER_RE.finditer(value):
+        separator = value[last : match.start()]
+        number = round_number(match.group(), precision)
+        if separator.strip(' \t\r\n,'):
+            # Function names, parentheses and units are kept with tidied whitespace
+            separator = _LIST_PUNCTUATION_RE.sub(r'\1\2', separator)
+            parts.append(_WHITESPACE_RE.sub(' ', separator))
+        elif previous and _needs_separator(previous, number):
+            parts.append(' ')
+        parts.append(number)
+        previous = number
+        last = match.end()
+
+    tail = value[last:]
+    if tail.strip():
+        parts.append(_WHITESPACE_RE.sub(' ', _LIST_PUNCTUATION_RE.sub(r'\1\2', tail)).rstrip())
+    return ''.join(parts)
+
+
+def minify_color(value: str) -> str:
+    """Lowercase hex colors and shorten ``#aabbcc`` to ``#abc``."""
+    match = _LONG_HEX_RE.fullmatch(value)
+    if match is None:
+        return value
+    digits = match.group(1).lower()
+    if len(digits) == 6 and digits[0::2] == digits[1::2]:
+        digits = digits[0::2]
+    return f'#{digits}'
+
+
+def escape_text(text: str) -> str:
+    """Escape character data."""
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def escape_attribute(value: str) -> str:
+    """Escape a double-quoted attribute value, keeping literal whitespace characters."""
+    value = value.replace('&', '&amp;').replace('<', '&lt;').replace('"', '&quot;')
+    if '\n' in value or '\r' in value or '\t' in value:
+        value = value.replace('\n', '&#10;').replace('\r', '&#13;').replace('\t', '&#9;')
+    return value
+
+
+def start_tag(name: str, attributes: list[tuple[str, str]], end: str = '>') -> str:
+    """Serialize a start tag (``end='/>'`` for an empty element)."""
+    serialized = ''.join(f' {attr}="{escape_attribute(value)}"' for attr, value in attributes)
+    return f'<{name}{serialized}{end}'
+
+
+def _pairs(attributes: list[str]) -> list[tuple[str, str]]:
+    """Pair up expat's ``ordered_attributes`` list."""
+    return list(zip(attributes[0::2], attributes[1::2], strict=True))
+
+
+def _byte_length(text: str) -> int:
+    return len(text.encode())
+
+
+@dataclass(slots=True)
+class _Element:
+    """An open element."""
+
+    name: str
+    attributes: list[tuple[str, str]]
+    namespaces: dict[str, str]
+    preserve_text: bool
+    # Attribute-less group whose own tags are never written
+    collapsed: bool = False
+    # Start tag written (otherwise still held back)
+    written: bool = False
+
+
+class SvgOptimizer:
+    """
+    Incremental SVG optimizer.
+
+    Feed the document in chunks of any size; each call returns the optimized
+    output produced so far. Documents must have an ``<svg>`` root; internal
+    entities (as in Illustrator exports) are expanded into the output, external
+    and parameter entities are refused.
+
+    Example:
+        optimizer = SvgOptimizer()
+        for chunk in chunks:
+            out.write(optimizer.feed(chunk))
+        out.write(optimizer.close())
+    """
+
+    def __init__(self, precision: int = DEFAULT_SVG_PRECISION) -> None:
+        """
+        Create an optimizer for one document.
+
+        Args:
+            precision: Decimal places kept in numbers
+        """
+        self.precision = precision
+        self.input_bytes = 0
+        self.output_bytes = 0
+        self.elements = 0
+        self.max_depth = 0
+        self.closed = False
+
+        self._stack: list[_Element] = []
+        # Number of stack frames (from the root) whose start tag is resolved:
+        # written, or collapsed and never to be written
+        self._resolved = 0
+        # Depth inside a removed subtree (0 outside one)
+        self._skip_depth = 0
+        self._in_cdata = False
+        self._output: list[str] = []
+        self._saved = dict.fromkeys(PASSES, 0)
+        self._pass_seconds = dict.fromkeys(PASSES, 0.0)
+        self._total_seconds = 0.0
+
+        parser = expat.ParserCreate()
+        parser.ordered_attributes = True
+        parser.buffer_text = True
+        parser.SetParamEntityParsing(expat.XML_PARAM_ENTITY_PARSING_NEVER)
+        parser.StartElementHandler = self._start_element
+        parser.EndElementHandler = self._end_element
+        parser.CharacterDataHandler = self._character_data
+        parser.StartCdataSectionHandler = self._start_cdata
+        parser.EndCdataSectionHandler = self._end_cdata
+        parser.CommentHandler = self._comment
+        parser.ProcessingInstructionHandler = self._processing_instruction
+        parser.XmlDeclHandler = self._xml_declaration
+        parser.StartDoctypeDeclHandler = self._doctype
+        parser.EntityDeclHandler = self._entity_declaration
+        self._parser = parser
+
+    def feed(self, chunk: bytes) -> bytes:
+        """
+        Parse the next chunk of the document.
+
+        Returns:
+            Optimized output for the chunk (possibly empty)
+
+        Raises:
+            ValueError: If the document is not well-formed or not an SVG
+        """
+        started = time.perf_counter()
+        self.input_bytes += len(chunk)
+        self._parse(chunk, final=False)
+        return self._flush_output(started)
+
+    def close(self) -> bytes:
+        """
+        Finish the document.
+
+        Returns:
+            The remaining output
+
+        Raises:
+            ValueError: If the document is incomplete
+        """
+        started = time.perf_counter()
+        self._parse(b'', final=True)
+        self.closed = True
+        return self._flush_output(started)
+
+    def report(self) -> SvgOptimizeReport:
+        """Summarize sizes and per-pass savings."""
+        passes = [
+            SvgPassReport(
+                name=name,
+                bytes_saved=self._saved[name],
+                time_ms=round(self._pass_seconds[name] * 1000, 2),
+            )
+            for name in PASSES
+        ]
+        passes.append(
+            SvgPassReport(
+                name='serialization',
+                bytes_saved=self.input_bytes - self.output_bytes - sum(self._saved.values()),
+                time_ms=round((self._total_seconds - sum(self._pass_seconds.values())) * 1000, 2),
+            )
+        )
+        return SvgOptimizeReport(
+            input_bytes=self.input_bytes,
+            output_bytes=self.output_bytes,
+            elements=self.elements,
+            max_depth=self.max_depth,
+            time_ms=round(self._total_seconds * 1000, 2),
+            passes=passes,
+        )
+
+    def _parse(self, data: bytes, final: bool) -> None:
+        try:
+            self._parser.Parse(data, final)
+        except expat.ExpatError as e:
+            raise ValueError(
+                f'Invalid SVG: {expat.ErrorString(e.code)} (line {e.lineno}, column {e.offset})'
+            ) from e
+
+    def _flush_output(self, started: float) -> bytes:
+        output = ''.join(self._output).encode()
+        self._output.clear()
+        self.output_bytes += len(output)
+        self._total_seconds += time.perf_counter() - started
+        return output
+
+    def _count(self, name: str, saved: int, started: float) -> None:
+        """Credit a pass with saved bytes and the time since ``started``."""
+        self._saved[name] += saved
+        self._pass_seconds[name] += time.perf_counter() - started
+
+    def _write_pending(self, depth: int) -> None:
+        """Write the held-back start tags of the outermost ``depth`` open elements."""
+        for element in self._stack[self._resolved : depth]:
+            if not element.collapsed:
+                self._output.append(start_tag(element.name, element.attributes))
+                element.written = True
+        self._resolved = max(self._resolved, depth)
+
+    def _start_element(self, name: str, raw_attributes: list[str]) -> None:
+        self.elements += 1
+        if self._skip_depth:
+            self._skip_depth += 1
+            self._saved['remove_metadata'] += _byte_length(start_tag(name, _pairs(raw_attributes)))
+            return
+
+        parent = self._stack[-1] if self._stack else None
+        if parent is None and name.rpartition(':')[2] != 'svg':
+            raise ValueError(f'Not an SVG document (root element is <{name}>)')
+
+        attributes = _pairs(raw_attributes)
+        namespaces = parent.namespaces if parent else {}
+        declared = {
+            attr.partition(':')[2]: value for attr, value in attributes if attr.startswith('xmlns:')
+        }
+        if declared:
+            namespaces = {**namespaces, **declared}
+
+        started = time.perf_counter()
+        prefix, _, _ = name.rpartition(':')
+        if name == 'metadata' or (prefix and namespaces.get(prefix) in EDITOR_NAMESPACES):
+            self._skip_depth = 1
+            self._count('remove_metadata', _byte_length(start_tag(name, attributes)), started)
+            return
+        self._pass_seconds['remove_metadata'] += time.perf_counter() - started
+
+        attributes = self._optimize_attributes(attributes, namespaces)
+        preserve_text = (
+            (parent is not None and parent.preserve_text)
+            or name in TEXT_ELEMENTS
+            or ('xml:space', 'preserve') in attributes
+        )
+        element = _Element(name, attributes, namespaces, preserve_text)
+
+        started = time.perf_counter()
+        in_switch = parent is not None and parent.name == 'switch'
+        if name == 'g' and not attributes and not in_switch:
+            element.collapsed = True
+            self._count('collapse_groups', len('<g></g>'), started)
+
+        self._stack.append(element)
+        self.max_depth = max(self.max_depth, len(self._stack))
+
+    def _optimize_attributes(
+        self, attributes: list[tuple[str, str]], namespaces: dict[str, str]
+    ) -> list[tuple[str, str]]:
+        result: list[tuple[str, str]] = []
+        for attr, value in attributes:
+            started = time.perf_counter()
+            prefix, _, local = attr.rpartition(':')
+            namespace = value if prefix == 'xmlns' else namespaces.get(prefix)
+            if prefix and namespace in EDITOR_NAMESPACES:
+                self._count('remove_metadata', _byte_length(f' {attr}="{value}"'), started)
+                continue
+            self._pass_seconds['remove_metadata'] += time.perf_counter() - started
+
+            if attr == 'd' or attr in NUMERIC_ATTRIBUTES:
+                started = time.perf_counter()
+                if attr == 'd':
+                    rounded = minify_path_data(value, self.precision)
+                elif attr in UNIT_INTERVAL_ATTRIBUTES:
+                    rounded = minify_numbers(value, max(self.precision, UNIT_INTERVAL_PRECISION))
+                else:
+                    rounded = minify_numbers(value, self.precision)
+                self._count('round_numbers', len(value) - len(rounded), started)
+                value = rounded
+
+            if not attr.startswith('data-'):
+                started = time.perf_counter()
+                minified = _WHITESPACE_RE.sub(' ', value).strip()
+                if attr in COLOR_ATTRIBUTES:
+                    minified = minify_color(minified)
+                elif attr == 'style':
+                    minified = _STYLE_PUNCTUATION_RE.sub(r'\1', minified).rstrip(';')
+                saved = len(value) - len(minified)
+                if not minified and attr not in CONDITIONAL_ATTRIBUTES:
+                    self._count('minify_attributes', saved + len(f' {attr}=""'), started)
+                    continue
+                self._count('minify_attributes', saved, started)
+                value = minified
+
+            result.append((attr, value))
+        return result
+
+    def _end_element(self, name: str) -> None:
+        if self._skip_depth:
+            self._skip_depth -= 1
+            self._saved['remove_metadata'] += len(f'</{name}>')
+            return
+
+        element = self._stack.pop()
+        depth = len(self._stack)
+        self._resolved = min(self._resolved, depth)
+        if element.collapsed:
+            return
+        if element.written:
+            self._output.append(f'</{name}>')
+            return
+
+        empty_tag = start_tag(name, element.attributes, end='/>')
+        parent = self._stack[-1] if self._stack else None
+        removable = (
+            name in REMOVABLE_EMPTY_ELEMENTS
+            and parent is not None
+            and parent.name != 'switch'
+            and not any(attr == 'filter' for attr, _ in element.attributes)
+        )
+        if removable:
+            self._saved['collapse_groups'] += _byte_length(empty_tag)
+            return
+        self._write_pending(depth)
+        self._output.append(empty_tag)
+
+    def _character_data(self, data: str) -> None:
+        if self._skip_depth:
+            self._saved['remove_metadata'] += _byte_length(escape_text(data))
+            return
+        if not self._stack:
+            return
+
+        if not self._stack[-1].preserve_text and not self._in_cdata and not data.strip():
+            started = time.perf_counter()
+            self._count('remove_whitespace', _byte_length(data), started)
+            return
+
+        self._write_pending(len(self._stack))
+        self._output.append(data if self._in_cdata else escape_text(data))
+
+    def _start_cdata(self) -> None:
+        if self._skip_depth:
+            self._saved['remove_metadata'] += len('<![CDATA[')
+            return
+        self._write_pending(len(self._stack))
+        self._output.append('<![CDATA[')
+        self._in_cdata = True
+
+    def _end_cdata(self) -> None:
+        if self._skip_depth:
+            self._saved['remove_metadata'] += len(']]>')
+            return
+        self._output.append(']]>')
+        self._in_cdata = False
+
+    def _comment(self, data: str) -> None:
+        pass_name = 'remove_metadata' if self._skip_depth else 'remove_comments'
+        self._saved[pass_name] += _byte_length(f'<!--{data}-->')
+
+    def _processing_instruction(self, target: str, data: str) -> None:
+        pass_name = 'remove_metadata' if self._skip_depth else 'remove_comments'
+        self._saved[pass_name] += _byte_length(f'<?{target} {data}?>')
+
+    def _xml_declaration(self, version: str | None, encoding: str | None, standalone: int) -> None:
+        declaration = f'<?xml version="{version or "1.0"}"'
+        if encoding:
+            declaration += f' encoding="{encoding}"'
+        if standalone != -1:
+            declaration += f' standalone="{"yes" if standalone else "no"}"'
+        self._saved['remove_comments'] += len(declaration + '?>')
+
+    def _doctype(
+        self,
+        name: str,
+        system_id: str | None,
+        public_id: str | None,
+        has_internal_subset: bool,
+    ) -> None:
+        doctype = f'<!DOCTYPE {name}'
+        if public_id:
+            doctype += f' PUBLIC "{public_id}"'
+        if system_id:
+            doctype += f' "{system_id}"' if public_id else f' SYSTEM "{system_id}"'
+        self._saved['remove_comments'] += len(doctype + '>')
+
+    def _entity_declaration(
+        self,
+        name: str,
+        is_parameter_entity: bool,
+        value: str | None,
+        base: str | None,
+        system_id: str | None,
+        public_id: str | None,
+        notation_name: str | None,
+    ) -> None:
+        # Internal entities are expanded by expat, whose amplification limit
+        # stops expansion bombs; the DOCTYPE holding them is dropped from the
+        # output. External ones would need fetching and are refused
+        if is_parameter_entity or value is None:
+            raise ValueError(f'External and parameter entities are not allowed (<!ENTITY {name}>)')
+        if expat.version_info < ENTITY_SAFE_EXPAT:
+            raise ValueError(f'Entity declarations are not allowed (<!ENTITY {name}>)')